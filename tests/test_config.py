@@ -0,0 +1,35 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unmonitarr
+
+
+class ValidateServiceConfigTest(unittest.TestCase):
+    def service_config(self, **overrides):
+        config = {'host': 'localhost', 'port': 7878, 'apikey': 'key'}
+        config.update(overrides)
+        return config
+
+    def test_rate_limit_is_optional(self):
+        self.assertEqual(unmonitarr.validate_service_config('radarr', self.service_config()), [])
+        self.assertEqual(unmonitarr.validate_service_config('radarr', self.service_config(rate_limit=None)), [])
+
+    def test_valid_rate_limits(self):
+        for rate in (0, 5, 2.5):
+            with self.subTest(rate=rate):
+                config = self.service_config(rate_limit=rate)
+                self.assertEqual(unmonitarr.validate_service_config('radarr', config), [])
+
+    def test_invalid_rate_limits(self):
+        for rate in (-1, '10', True, float('nan'), float('inf'), [5]):
+            with self.subTest(rate=rate):
+                errors = unmonitarr.validate_service_config('radarr', self.service_config(rate_limit=rate))
+                self.assertEqual(len(errors), 1)
+                self.assertTrue(errors[0].startswith('radarr.rate_limit must be'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import logging
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unmonitarr
+
+
+class ProcessMediaTest(unittest.TestCase):
+    def setUp(self):
+        unmonitarr.logger = logging.getLogger('unmonitarr')
+        self.configs = {'radarr': {'dry_run': False}, 'sonarr': {'dry_run': False}}
+        self.state = unmonitarr.create_empty_state()
+
+    def test_failing_service_keeps_the_other_services_work(self):
+        def process_sonarr(config, state, monitoring_mode):
+            state['sonarr']['processed_ids'].add(7)
+            return 0
+
+        with mock.patch.object(unmonitarr, 'process_media_radarr', side_effect=RuntimeError('radarr down')), \
+             mock.patch.object(unmonitarr, 'process_media_sonarr', side_effect=process_sonarr), \
+             mock.patch.object(unmonitarr, 'save_state') as save_state:
+            with self.assertRaisesRegex(RuntimeError, 'radarr down'):
+                unmonitarr.process_media(self.configs, monitoring_mode=True, state=self.state)
+
+        save_state.assert_called_once_with(self.state)
+        self.assertEqual(self.state['sonarr']['processed_ids'], {7})
+
+    def test_log_lines_are_tagged_with_the_service(self):
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        handler.addFilter(unmonitarr.ServiceLogFilter())
+        unmonitarr.logger.addHandler(handler)
+        self.addCleanup(unmonitarr.logger.removeHandler, handler)
+
+        def process(config, state, monitoring_mode):
+            unmonitarr.logger.warning('working')
+            return 0
+
+        with mock.patch.object(unmonitarr, 'process_media_radarr', side_effect=process), \
+             mock.patch.object(unmonitarr, 'process_media_sonarr', side_effect=process):
+            unmonitarr.process_media(self.configs, state=self.state)
+
+        prefixes = sorted(record.service_prefix for record in records if record.getMessage() == 'working')
+        self.assertEqual(prefixes, ['[Radarr] ', '[Sonarr] '])
+        self.assertIsNone(unmonitarr.get_log_service())
+
+
+if __name__ == '__main__':
+    unittest.main()
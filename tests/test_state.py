@@ -0,0 +1,53 @@
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unmonitarr
+
+
+class LoadStateTest(unittest.TestCase):
+    def setUp(self):
+        unmonitarr.logger = logging.getLogger('unmonitarr')
+        self.tmpdir = tempfile.mkdtemp()
+        self.original_state_file = unmonitarr.state_file
+        unmonitarr.state_file = os.path.join(self.tmpdir, 'unmonitarr_state.json')
+        unmonitarr._skip_next_backup = False
+
+    def tearDown(self):
+        unmonitarr.state_file = self.original_state_file
+        unmonitarr._skip_next_backup = False
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, path, content):
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def write_backup(self):
+        backup = {'radarr': {'processed_ids': [1], 'unmonitored_ids': [1]}}
+        self.write(f"{unmonitarr.state_file}.bak", json.dumps(backup))
+
+    def test_non_object_state_recovers_from_backup(self):
+        for content in ('[]', 'null', '42', '{"radarr": []}'):
+            with self.subTest(content=content):
+                unmonitarr._skip_next_backup = False
+                self.write(unmonitarr.state_file, content)
+                self.write_backup()
+                state = unmonitarr.load_state()
+                self.assertEqual(state['radarr']['unmonitored_ids'], {1})
+                self.assertTrue(unmonitarr._skip_next_backup)
+
+    def test_non_object_state_without_backup_starts_empty(self):
+        self.write(unmonitarr.state_file, 'null')
+        state = unmonitarr.load_state()
+        self.assertEqual(state['radarr']['unmonitored_ids'], set())
+        self.assertTrue(unmonitarr._skip_next_backup)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import base64
+import http.client
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unmonitarr
+
+
+class WebhookAuthTest(unittest.TestCase):
+    def setUp(self):
+        unmonitarr.logger = logging.getLogger('unmonitarr')
+        self.server = unmonitarr.start_webhook_listener(0, host='127.0.0.1', username='user', password='secret')
+        self.port = self.server.server_address[1]
+        while not unmonitarr._webhook_events.empty():
+            unmonitarr._webhook_events.get_nowait()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def post(self, authorization=None, body=b'{"eventType": "Download"}'):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        connection.putrequest('POST', '/')
+        if authorization is not None:
+            # putheader encodes str values as latin-1, so non-ASCII goes over the wire as-is
+            connection.putheader('Authorization', authorization)
+        connection.putheader('Content-Length', str(len(body)))
+        connection.endheaders(body)
+        status = connection.getresponse().status
+        connection.close()
+        return status
+
+    def test_valid_credentials_queue_event(self):
+        credentials = base64.b64encode(b'user:secret').decode()
+        self.assertEqual(self.post(f'Basic {credentials}'), 200)
+        self.assertEqual(unmonitarr._webhook_events.get(timeout=1), 'Download')
+
+    def test_missing_credentials_rejected(self):
+        self.assertEqual(self.post(), 401)
+
+    def test_non_ascii_authorization_rejected(self):
+        self.assertEqual(self.post('Basic éè'), 401)
+        self.assertTrue(unmonitarr._webhook_events.empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,35 +21,195 @@ Sonarr Hierarchical Unmonitoring Logic:
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import re
 import os
 import time
+import random
+import math
 import logging
 from logging.handlers import RotatingFileHandler
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 import argparse
 import sys
-import concurrent.futures
-from functools import partial
-import hashlib
 import shutil
+import threading
+import base64
+import hmac
+import queue
+import concurrent.futures
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from functools import lru_cache
 from dateutil import parser as date_parser
 
+# orjson is optional; it parses large API responses several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging - write to both rotating file in the script directory and console
 script_dir = os.path.dirname(os.path.realpath(__file__))
 log_file = os.path.join("/logs", "unmonitarr.log")
 state_file = os.environ.get("STATE_FILE", os.path.join("/config", "unmonitarr_state.json"))
 
+# The state file is only read back by this script, so it is written compactly
+# unless indented output is requested for debugging
+PRETTY_STATE = os.environ.get("UNMONITARR_PRETTY_STATE", "").lower() in ('true', 'yes', '1')
+
+# The .bak backup is refreshed at most this often (see save_state)
+BACKUP_INTERVAL = 3600  # seconds
+_last_backup_time = None
+
+# Set when the state file failed to load, so the next save keeps the .bak
+# instead of replacing it with the corrupt file (see load_state)
+_skip_next_backup = False
+
+# Set once the state directory is known to exist
+_state_dir_ready = False
+
 # Initialize logger globally
 logger = None
 
+# Name of the service the current thread works for, shown in its log lines
+_log_context = threading.local()
+
+# Shared HTTP sessions and rate limiters keyed by service name (see get_session)
+_sessions = {}
+_rate_limiters = {}
+_sessions_lock = threading.Lock()
+
+# Retry policy for transient API failures (see api_request)
+API_MAX_RETRIES = 3
+API_RETRY_MAX_DELAY = 30  # seconds
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Episode lists fetched by fetch_new_media for series it selects for processing,
+# handed to the first get_episodes call for the series so it is not downloaded
+# twice in one scan; entries older than EPISODE_CACHE_TTL are refetched
+EPISODE_CACHE_TTL = 300  # seconds
+_episode_cache = {}
+
+# Last full media list per service with its ETag/Last-Modified validators,
+# reused when the server answers a conditional GET with 304 (see fetch_all_media)
+_media_cache = {}
+
+# Maximum number of movies unmonitored with one editor request
+EDITOR_BATCH_SIZE = 100
+
+def json_loads(data):
+    """Parse JSON bytes or text, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def response_json(response):
+    """
+    Decode an API response body, using orjson when it is installed.
+    Invalid bodies fall back to response.json() so callers still get a
+    requests.exceptions.JSONDecodeError (a RequestException).
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            pass
+    return response.json()
+
+# Common pattern structures for release groups, in order of specificity.
+# Each pattern has exactly one capture group holding the group name.
+RELEASE_GROUP_PATTERNS = [
+    # Primary pattern: Release group at end preceded by hyphen (most common)
+    # Examples: "Movie Title-RELEASEGROUP", "Show.S01E01-RELEASEGROUP"
+    r'-([A-Za-z0-9._-]+)$',
+    
+    # Bracket pattern: [RELEASEGROUP] at the end
+    # Examples: "Movie Title [RELEASEGROUP]", "Show.S01E01 [RELEASEGROUP]"
+    r'\[([A-Za-z0-9._-]+)\]$',
+    
+    # Dot separated pattern: ending with .RELEASEGROUP
+    # Examples: "Movie.Title.2023.1080p.RELEASEGROUP", "Show.S01E01.RELEASEGROUP"
+    r'\.([A-Za-z0-9_-]{2,})$',
+    
+    # Common format with multi brackets: tags then group
+    # Examples: "Movie [1080p] [WEB-DL]-RELEASEGROUP"
+    r'\][\s]*-[\s]*([A-Za-z0-9._-]+)$',
+    
+    # Common torrent format with dots
+    # Examples: "Movie.Title.2023.1080p.WEB-DL.RELEASEGROUP"
+    r'(?:480p|720p|1080p|2160p|4k|bluray|web-dl|webrip|hdtv|xvid|aac|ac3|dts|bd5|bd9|bd25|bd50|bd66|bd100)(?:\.[^.]+)*\.([A-Za-z0-9_-]{2,})$',
+    
+    # Scene naming convention
+    # Examples: "Movie.Title.2023.1080p.WEB-DL.x264-RELEASEGROUP"
+    r'(?:x264|x265|h264|h265|hevc|xvid)[\s.]*-[\s.]*([A-Za-z0-9._-]+)(?:\..*)?$',
+    
+    # Handle brackets in the middle with hyphen after
+    # Examples: "Movie.Title.2023.[1080p]-RELEASEGROUP"
+    r'\][\s]*-[\s]*([A-Za-z0-9._-]+)(?:\..*)?$',
+    
+    # Quality patterns with release groups
+    # Examples: "Movie.Title.2023.1080p.RELEASEGROUP"
+    r'(?:480p|720p|1080p|2160p)\.([A-Za-z0-9._-]{2,})$',
+    
+    # Very liberal pattern to catch almost anything after the last dot
+    r'\.([A-Za-z0-9]{2,})$',
+    
+    # Fallback pattern for any group-like strings at the end
+    # This is less precise but might catch edge cases
+    r'(?:[\.\s\[\]\(\)\-]|^)([A-Za-z0-9]{2,})$'
+]
+
+# The pattern table fused into one regex, compiled once at import. Every
+# alternative is anchored at the start and skips ahead lazily, so the engine
+# tries the patterns in table order, each at its leftmost possible position,
+# exactly like a loop of separate re.search() calls would. The index of the
+# capture group that matched identifies the pattern.
+_RELEASE_GROUP_RE = re.compile(
+    '^(?:' + '|'.join(r'[\s\S]*?' + pattern for pattern in RELEASE_GROUP_PATTERNS) + ')',
+    re.IGNORECASE
+)
+
+# Fallbacks for names the pattern table does not cover
+_SCENE_GROUP_RE = re.compile(
+    r'(?:\.|\-|\[|\s)((?:AMIABLE|SPARKS|GECKOS|DRONES|EVO|YIFY|YTS|RARBG)\b.*?)(?:\.|\]|\[|\-|$)',
+    re.IGNORECASE
+)
+COMMON_RELEASE_GROUPS = ['yts', 'yify', 'rarbg', 'ettv', 'eztv', 'ctrlhd', 'ntb', 'web', 'web-dl']
+# Look for each group with word boundaries, fused the same way as
+# _RELEASE_GROUP_RE so the list order still decides which group wins
+_COMMON_GROUP_RE = re.compile(
+    '^(?:' + '|'.join(r'[\s\S]*?(?:^|\W)(' + re.escape(group) + r')(?:$|\W)'
+                      for group in COMMON_RELEASE_GROUPS) + ')',
+    re.IGNORECASE
+)
+_MULTI_WORD_GROUP_RE = re.compile(r'-\s*([A-Za-z0-9]+(?: [A-Za-z0-9]+)+)')
+
+def set_log_service(service):
+    """Tag the log lines of the current thread with a service name (None to clear)"""
+    _log_context.service = service
+
+def get_log_service():
+    """Return the service name the current thread's log lines are tagged with"""
+    return getattr(_log_context, 'service', None)
+
+class ServiceLogFilter(logging.Filter):
+    """Add a "[Service] " prefix to records logged while a service is being processed"""
+    
+    def filter(self, record):
+        service = get_log_service()
+        record.service_prefix = f"[{service.capitalize()}] " if service else ""
+        return True
+
 def setup_logging(debug_mode=False, max_size_mb=10, backup_count=3):
     """Configure logging with rotation and proper levels"""
     log_level = logging.DEBUG if debug_mode else logging.INFO
     
-    # Create a custom formatter
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    # Create a custom formatter; Radarr and Sonarr run at the same time,
+    # so each line says which service it belongs to
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(service_prefix)s%(message)s')
+    service_filter = ServiceLogFilter()
     
     # Set up rotating file handler (10MB per file, keep 3 backups by default)
     max_bytes = max_size_mb * 1024 * 1024
@@ -60,11 +220,13 @@ def setup_logging(debug_mode=False, max_size_mb=10, backup_count=3):
     )
     file_handler.setLevel(log_level)
     file_handler.setFormatter(formatter)
+    file_handler.addFilter(service_filter)
     
     # Set up console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
+    console_handler.addFilter(service_filter)
     
     # Configure the root logger
     root_logger = logging.getLogger()
@@ -78,7 +240,22 @@ def setup_logging(debug_mode=False, max_size_mb=10, backup_count=3):
     root_logger.addHandler(file_handler)
     root_logger.addHandler(console_handler)
     
-    return root_logger
+    # Log through a named logger; records still reach the handlers above,
+    # and library loggers (urllib3 etc.) keep using the root configuration
+    return logging.getLogger('unmonitarr')
+
+def read_log_settings(config_path):
+    """
+    Peek at the general section of the config file for the logging settings,
+    so logging can be set up once before the full config is loaded.
+    Returns defaults if the file cannot be read; load_config reports the problem.
+    """
+    try:
+        with open(config_path, 'rb') as config_file:
+            general = json_loads(config_file.read()).get('general', {})
+        return bool(general.get('debug', False)), general.get('log_size', 10), general.get('log_backups', 3)
+    except (OSError, ValueError, AttributeError):
+        return False, 10, 3
 
 def parse_arguments():
     """Parse command line arguments for config file path and operating mode"""
@@ -93,19 +270,49 @@ def parse_arguments():
                         help="Force a full scan even in monitoring mode")
     return parser.parse_args()
 
+# Required settings for each enabled service: key -> (accepted types, value check, expected)
+SERVICE_SCHEMA = {
+    'host': (str, bool, "a non-empty host name"),
+    'port': ((int, str), lambda port: str(port).isdigit() and 0 < int(port) < 65536, "a port between 1 and 65535"),
+    'apikey': (str, bool, "a non-empty API key"),
+}
+
+# Optional settings, checked only when present and not null
+OPTIONAL_SERVICE_SCHEMA = {
+    'rate_limit': ((int, float), lambda rate: math.isfinite(rate) and rate >= 0,
+                   "a number of requests per second, 0 or more (0 for unlimited)"),
+}
+
+def validate_service_config(service, service_config):
+    """Check a service config against SERVICE_SCHEMA and OPTIONAL_SERVICE_SCHEMA, returning every problem found"""
+    errors = []
+    for key, (types, check, expected) in (*SERVICE_SCHEMA.items(), *OPTIONAL_SERVICE_SCHEMA.items()):
+        if key not in service_config:
+            if key in SERVICE_SCHEMA:
+                errors.append(f"{service}.{key} is missing")
+            continue
+        value = service_config[key]
+        if value is None and key in OPTIONAL_SERVICE_SCHEMA:
+            continue
+        if not isinstance(value, types) or isinstance(value, bool) or not check(value):
+            errors.append(f"{service}.{key} must be {expected}, got {value!r}")
+    return errors
+
 def load_config(config_path):
     """Load configuration from JSON file with enhanced validation and fixing"""
     try:
-        with open(config_path, 'r') as config_file:
-            config_data = json.load(config_file)
+        with open(config_path, 'rb') as config_file:
+            config_data = json_loads(config_file.read())
         
         # Check and fix release_groups format if needed
         if 'general' in config_data and 'release_groups' in config_data['general']:
-            # If the list contains only one item and it has commas, split it
+            # Split any comma-separated entries into separate items in a single pass
             release_groups = config_data['general']['release_groups']
-            if len(release_groups) == 1 and ',' in release_groups[0]:
-                # Split the comma-separated string into a list
-                fixed_groups = [group.strip() for group in release_groups[0].split(',')]
+            if any(',' in entry for entry in release_groups):
+                fixed_groups = [group.strip()
+                                for entry in release_groups
+                                for group in entry.split(',')
+                                if group.strip()]
                 config_data['general']['release_groups'] = fixed_groups
                 
                 logger.warning("Detected comma-separated release groups in a single string. " +
@@ -120,34 +327,43 @@ def load_config(config_path):
             
         # Create the service-specific configs
         configs = {}
+        services = config_data.get('services', {})
         
-        # Process Radarr config
-        if config_data.get('services', {}).get('radarr', {}).get('enabled', False):
-            radarr_config = config_data['services']['radarr'].copy()
-            radarr_config['service'] = 'radarr'
-            radarr_config['release_groups'] = config_data['general']['release_groups']
-            radarr_config['dry_run'] = config_data['general']['dry_run']
-            radarr_config['debug'] = config_data['general']['debug']
-            radarr_config['concurrent'] = config_data['general']['concurrent']
-            radarr_config['log_size'] = config_data['general']['log_size']
-            radarr_config['log_backups'] = config_data['general']['log_backups']
-            radarr_config['monitoring'] = config_data['general'].get('monitoring', {})
-            configs['radarr'] = radarr_config
-            logger.info(f"Radarr configuration loaded: {radarr_config['host']}:{radarr_config['port']}")
+        # Settings shared by every service, built once
+        general = config_data.get('general', {})
+        shared_settings = None
+        errors = []
+        
+        for service, name in (('radarr', 'Radarr'), ('sonarr', 'Sonarr')):
+            if not services.get(service, {}).get('enabled', False):
+                continue
+            
+            # Validate every enabled service before giving up, so all problems are reported at once
+            service_errors = validate_service_config(service, services[service])
+            if service_errors:
+                errors.extend(service_errors)
+                continue
+            
+            if shared_settings is None:
+                shared_settings = {
+                    'release_groups': general['release_groups'],
+                    'target_groups': frozenset(group.lower() for group in general['release_groups']),
+                    'dry_run': general['dry_run'],
+                    'debug': general['debug'],
+                    'concurrent': general['concurrent'],
+                    'log_size': general['log_size'],
+                    'log_backups': general['log_backups'],
+                    'monitoring': general.get('monitoring', {})
+                }
+            
+            service_config = services[service].copy()
+            service_config['service'] = service
+            service_config.update(shared_settings)
+            configs[service] = service_config
+            logger.info(f"{name} configuration loaded: {service_config['host']}:{service_config['port']}")
         
-        # Process Sonarr config
-        if config_data.get('services', {}).get('sonarr', {}).get('enabled', False):
-            sonarr_config = config_data['services']['sonarr'].copy()
-            sonarr_config['service'] = 'sonarr'
-            sonarr_config['release_groups'] = config_data['general']['release_groups']
-            sonarr_config['dry_run'] = config_data['general']['dry_run']
-            sonarr_config['debug'] = config_data['general']['debug']
-            sonarr_config['concurrent'] = config_data['general']['concurrent']
-            sonarr_config['log_size'] = config_data['general']['log_size']
-            sonarr_config['log_backups'] = config_data['general']['log_backups']
-            sonarr_config['monitoring'] = config_data['general'].get('monitoring', {})
-            configs['sonarr'] = sonarr_config
-            logger.info(f"Sonarr configuration loaded: {sonarr_config['host']}:{sonarr_config['port']}")
+        if errors:
+            raise ValueError("Invalid configuration: " + "; ".join(errors))
         
         # Log the shared settings with proper formatting
         for service, config in configs.items():
@@ -161,6 +377,9 @@ def load_config(config_path):
     except (json.JSONDecodeError, KeyError) as e:
         logger.error(f"Error parsing config file: {str(e)}")
         raise
+    except ValueError as e:
+        logger.error(str(e))
+        raise
     except FileNotFoundError:
         logger.error(f"Config file not found: {config_path}")
         raise
@@ -176,61 +395,248 @@ def get_headers(config):
         "Content-Type": "application/json"
     }
 
+def get_session(config):
+    """
+    Get the shared HTTP session for a service, creating it on first use.
+    
+    The session carries the API headers and a pooled adapter so that every
+    request to the same Radarr/Sonarr host reuses a keep-alive connection.
+    The pool holds one connection per worker thread ('concurrent' setting);
+    pool_block makes a worker wait for a free connection instead of opening
+    a throwaway one when the pool is exhausted.
+    """
+    service = config['service']
+    with _sessions_lock:
+        session = _sessions.get(service)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(get_headers(config))
+            max_workers = max(1, config.get('concurrent', 1))
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=max_workers,
+                pool_block=True,
+                max_retries=0
+            )
+            session.mount('http://', adapter)
+            _sessions[service] = session
+        return session
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by all workers talking to one service.
+    
+    Allows `rate` requests per second on average (unlimited if rate is falsy)
+    and lets the server push everyone back via defer() when it answers with
+    a Retry-After header.
+    """
+    
+    def __init__(self, rate=None):
+        self.rate = rate
+        self.capacity = max(1.0, rate) if rate else 1.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if not self.rate:
+                        return
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+    
+    def defer(self, seconds):
+        """Hold back all requests for the given number of seconds"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+def get_rate_limiter(config):
+    """Get the shared rate limiter for a service, creating it on first use"""
+    service = config['service']
+    with _sessions_lock:
+        limiter = _rate_limiters.get(service)
+        if limiter is None:
+            limiter = RateLimiter(config.get('rate_limit'))
+            _rate_limiters[service] = limiter
+        return limiter
+
+def parse_retry_after(response):
+    """Return the Retry-After delay of a response in seconds, or None if absent/invalid"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def close_sessions():
+    """Close all shared HTTP sessions and release their sockets"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _rate_limiters.clear()
+
+def api_request(config, method, url, **kwargs):
+    """
+    Send an API request through the service's shared session, raising on 4XX/5XX responses.
+    
+    Connection errors, timeouts, 429 and 5XX responses are transient and are
+    retried with jittered exponential backoff; other client errors fail immediately.
+    """
+    session = get_session(config)
+    limiter = get_rate_limiter(config)
+    
+    for attempt in range(API_MAX_RETRIES + 1):
+        retry_after = None
+        limiter.acquire()
+        try:
+            response = session.request(method, url, timeout=30, **kwargs)
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == API_MAX_RETRIES:
+                response.raise_for_status()
+                return response
+            error = f"HTTP {response.status_code}"
+            retry_after = parse_retry_after(response)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == API_MAX_RETRIES:
+                raise
+            error = str(e)
+        
+        if retry_after is not None:
+            # The server told us when to come back; hold off every worker until then
+            delay = min(API_RETRY_MAX_DELAY, retry_after)
+            limiter.defer(delay)
+        else:
+            # Exponential backoff capped at API_RETRY_MAX_DELAY, plus up to 50% jitter
+            delay = min(API_RETRY_MAX_DELAY, 2 ** attempt) * (1 + random.random() * 0.5)
+        logger.warning(f"API request to {url} failed, retrying in {delay:.1f}s "
+                       f"(attempt {attempt + 1}/{API_MAX_RETRIES}): {error}")
+        time.sleep(delay)
+
+# ID collections tracked per service; held as sets in memory, saved as JSON lists
+STATE_ID_KEYS = {
+    'radarr': ('processed_ids', 'unmonitored_ids'),
+    'sonarr': ('processed_ids', 'processed_episode_ids', 'unmonitored_ids', 'unmonitored_episode_ids')
+}
+
+def create_empty_state():
+    """Create a new, empty state with hierarchical tracking"""
+    return {
+        'last_scan': None,
+        'radarr': {
+            'processed_ids': set(),
+            'unmonitored_ids': set()  # Track actually unmonitored IDs
+        },
+        'sonarr': {
+            'processed_ids': set(),
+            'processed_episode_ids': set(),
+            'unmonitored_ids': set(),  # Track actually unmonitored series IDs
+            'unmonitored_episode_ids': set(),  # Track actually unmonitored episode IDs
+            'unmonitored_seasons': {},  # Track unmonitored seasons by series ID
+            'series_stats': {}  # File statistics of each series when it was last checked
+        }
+    }
+
+def read_state_file(path):
+    """Read and normalize a state file, raising ValueError if it is not a valid state"""
+    # One bulk binary read; json_loads skips the text decoder with orjson
+    with open(path, 'rb') as f:
+        state = json_loads(f.read())
+    
+    # Valid JSON of the wrong shape (e.g. [] or null) is as corrupt as invalid JSON
+    if not isinstance(state, dict):
+        raise ValueError(f"expected a JSON object, got {type(state).__name__}")
+    for service in STATE_ID_KEYS:
+        if not isinstance(state.get(service, {}), dict):
+            raise ValueError(f"expected '{service}' to be a JSON object")
+        
+    # Upgrade old state format if necessary, and turn the ID lists
+    # into sets so membership checks don't scan the whole list
+    for service, keys in STATE_ID_KEYS.items():
+        service_state = state.setdefault(service, {})
+        for key in keys:
+            service_state[key] = set(service_state.get(key, []))
+            
+    # Add new hierarchical tracking for seasons. JSON object keys are
+    # always strings, while series IDs are ints everywhere else.
+    state['sonarr']['unmonitored_seasons'] = {
+        int(series_id): seasons
+        for series_id, seasons in state['sonarr'].get('unmonitored_seasons', {}).items()
+    }
+    state['sonarr']['series_stats'] = {
+        int(series_id): stats
+        for series_id, stats in state['sonarr'].get('series_stats', {}).items()
+    }
+    return state
+
 def load_state():
     """Load the state from file or initialize a new empty state with enhanced hierarchical tracking"""
+    global _skip_next_backup
     try:
-        if os.path.exists(state_file):
-            with open(state_file, 'r') as f:
-                state = json.load(f)
-                
-                # Upgrade old state format if necessary
-                if 'radarr' in state and 'unmonitored_ids' not in state['radarr']:
-                    state['radarr']['unmonitored_ids'] = []
-                    
-                if 'sonarr' in state:
-                    if 'unmonitored_ids' not in state['sonarr']:
-                        state['sonarr']['unmonitored_ids'] = []
-                    if 'unmonitored_episode_ids' not in state['sonarr']:
-                        state['sonarr']['unmonitored_episode_ids'] = []
-                    # Add new hierarchical tracking for seasons
-                    if 'unmonitored_seasons' not in state['sonarr']:
-                        state['sonarr']['unmonitored_seasons'] = {}
-                    
-                logger.info(f"Loaded state file from {state_file}")
-                return state
-        else:
+        try:
+            size = os.stat(state_file).st_size
+        except FileNotFoundError:
             logger.info(f"No state file found, initializing new state")
-            return {
-                'last_scan': None,
-                'radarr': {
-                    'processed_ids': [],
-                    'unmonitored_ids': []  # Track actually unmonitored IDs
-                },
-                'sonarr': {
-                    'processed_ids': [], 
-                    'processed_episode_ids': [],
-                    'unmonitored_ids': [],  # Track actually unmonitored series IDs
-                    'unmonitored_episode_ids': [],  # Track actually unmonitored episode IDs
-                    'unmonitored_seasons': {}  # Track unmonitored seasons by series ID
-                }
-            }
+            return create_empty_state()
+        
+        try:
+            # A 0-byte file is usually a truncated write, so it is treated as corrupt too
+            if size == 0:
+                raise ValueError("file is empty")
+            state = read_state_file(state_file)
+        except ValueError as e:
+            # A corrupt state file would otherwise throw away everything
+            # tracked so far; try the backup before starting over. Until a
+            # good state file has been written again, the corrupt one must
+            # not replace the backup (see save_state).
+            _skip_next_backup = True
+            backup_file = f"{state_file}.bak"
+            logger.error(f"State file is corrupt ({str(e)}), trying backup {backup_file}")
+            state = read_state_file(backup_file)
+            logger.info(f"Loaded state from backup {backup_file}")
+            return state
+            
+        logger.info(f"Loaded state file from {state_file}")
+        return state
     except Exception as e:
         logger.error(f"Error loading state file: {str(e)}")
         # Return a new, empty state on error
-        return {
-            'last_scan': None,
-            'radarr': {
-                'processed_ids': [],
-                'unmonitored_ids': []
-            },
-            'sonarr': {
-                'processed_ids': [], 
-                'processed_episode_ids': [],
-                'unmonitored_ids': [],
-                'unmonitored_episode_ids': [],
-                'unmonitored_seasons': {}
-            }
-        }
+        return create_empty_state()
+
+def count_unmonitored(state):
+    """
+    Count what the state tracks as unmonitored.
+    
+    Returns:
+        tuple: (movies, episodes, seasons, series)
+    """
+    if not state:
+        return 0, 0, 0, 0
+    radarr_state = state.get('radarr', {})
+    sonarr_state = state.get('sonarr', {})
+    return (
+        len(radarr_state.get('unmonitored_ids', ())),
+        len(sonarr_state.get('unmonitored_episode_ids', ())),
+        sum(map(len, sonarr_state.get('unmonitored_seasons', {}).values())),
+        len(sonarr_state.get('unmonitored_ids', ()))
+    )
 
 def generate_state_summary(state):
     """
@@ -245,25 +651,23 @@ def generate_state_summary(state):
     summary = []
     summary.append("=== Current Unmonitarr State Summary ===")
     
+    radarr_state = state.get('radarr')
+    sonarr_state = state.get('sonarr')
+    
     # Radarr summary
-    if 'radarr' in state:
-        radarr_movies = len(state['radarr'].get('unmonitored_ids', []))
+    if radarr_state is not None:
+        radarr_movies = len(radarr_state.get('unmonitored_ids', ()))
         summary.append(f"Radarr: {radarr_movies} movies unmonitored")
     
     # Sonarr detailed summary
-    if 'sonarr' in state:
-        sonarr_episodes = len(state['sonarr'].get('unmonitored_episode_ids', []))
-        sonarr_series = len(state['sonarr'].get('unmonitored_ids', []))
-        
-        # Count total seasons unmonitored
-        seasons_count = 0
-        series_with_seasons = 0
+    if sonarr_state is not None:
+        sonarr_episodes = len(sonarr_state.get('unmonitored_episode_ids', ()))
+        sonarr_series = len(sonarr_state.get('unmonitored_ids', ()))
         
-        if 'unmonitored_seasons' in state['sonarr']:
-            for series_id, seasons in state['sonarr']['unmonitored_seasons'].items():
-                if seasons:
-                    series_with_seasons += 1
-                    seasons_count += len(seasons)
+        # Count total seasons unmonitored (map keeps both loops in C)
+        season_lists = sonarr_state.get('unmonitored_seasons', {}).values()
+        seasons_count = sum(map(len, season_lists))
+        series_with_seasons = sum(map(bool, season_lists))
         
         summary.append(f"Sonarr: {sonarr_episodes} episodes unmonitored")
         summary.append(f"Sonarr: {seasons_count} seasons unmonitored across {series_with_seasons} series")
@@ -283,27 +687,69 @@ def generate_state_summary(state):
     
     return "\n".join(summary)
 
+def dump_state(state):
+    """Serialize the state to JSON bytes; ID sets are written as sorted lists"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if PRETTY_STATE:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(state, default=sorted, option=option)
+    if PRETTY_STATE:
+        return json.dumps(state, indent=2, default=sorted).encode()
+    return json.dumps(state, separators=(',', ':'), default=sorted).encode()
+
+def backup_state_file():
+    """
+    Make the current state file the .bak backup without copying any data.
+    
+    A hard link keeps the live state file in place until the new one is
+    renamed over it; filesystems without hard links fall back to a copy,
+    so there is never a moment without a state file.
+    """
+    backup_file = f"{state_file}.bak"
+    temp_link = f"{backup_file}.tmp"
+    try:
+        if os.path.exists(temp_link):
+            os.remove(temp_link)
+        os.link(state_file, temp_link)
+        os.replace(temp_link, backup_file)
+    except OSError:
+        shutil.copy2(state_file, temp_link)
+        os.replace(temp_link, backup_file)
+
 def save_state(state):
     """Save the current state to file with enhanced reporting"""
+    global _last_backup_time, _state_dir_ready, _skip_next_backup
     try:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(state_file), exist_ok=True)
-        
-        # Create a backup of the current state file if it exists
-        if os.path.exists(state_file):
-            backup_file = f"{state_file}.bak"
-            shutil.copy2(state_file, backup_file)
-            
-        # Update the last scan timestamp
-        state['last_scan'] = datetime.now().isoformat()
-        
-        # Write the new state
-        with open(state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-            logger.info(f"Saved state file to {state_file}")
+        # Create directory if it doesn't exist (first save only)
+        if not _state_dir_ready:
+            os.makedirs(os.path.dirname(state_file), exist_ok=True)
+            _state_dir_ready = True
+        
+        # Update the last scan timestamp, in UTC like the dates the APIs return
+        state['last_scan'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        
+        # Write the new state to a temporary file first so a crash can
+        # never leave a half-written state file behind
+        temp_file = f"{state_file}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(dump_state(state))
+            f.flush()
+            os.fsync(f.fileno())
+            
+        # Keep the previous state as a backup without copying its data.
+        # If the backup was refreshed within BACKUP_INTERVAL, it is kept as is.
+        backup_due = _last_backup_time is None or time.monotonic() - _last_backup_time >= BACKUP_INTERVAL
+        if backup_due and not _skip_next_backup and os.path.exists(state_file):
+            backup_state_file()
+            _last_backup_time = time.monotonic()
+            
+        os.replace(temp_file, state_file)
+        _skip_next_backup = False
+        logger.info(f"Saved state file to {state_file}")
             
         # Log a summary of the current state
-        if logger.level <= logging.INFO:
+        if logger.isEnabledFor(logging.INFO):
             summary = generate_state_summary(state)
             for line in summary.split("\n"):
                 logger.info(line)
@@ -314,16 +760,37 @@ def save_state(state):
 def fetch_all_media(config):
     """Fetch all media items from Radarr or Sonarr"""
     api_url = get_api_url(config)
-    headers = get_headers(config)
     
     endpoint = "movie" if config['service'] == 'radarr' else "series"
     url = f"{api_url}/{endpoint}"
     
     logger.info(f"Fetching all media items from {url}")
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        media_items = response.json()
+        # With conditional_requests enabled, revalidate the previous list instead of
+        # downloading it again; servers that send no ETag/Last-Modified are unaffected
+        conditional = config.get('conditional_requests', False)
+        cached = _media_cache.get(config['service']) if conditional else None
+        headers = {}
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+        
+        response = api_request(config, 'GET', url, headers=headers)
+        if cached and response.status_code == 304:
+            logger.info(f"Media list unchanged since last fetch, reusing {len(cached['items'])} cached items")
+            media_items = cached['items']
+        else:
+            media_items = response_json(response)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if conditional and (etag or last_modified):
+                _media_cache[config['service']] = {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'items': media_items
+                }
         
         # Apply sample size limit if configured
         if config.get('sample_size') and config['sample_size'] > 0:
@@ -336,3124 +803,59 @@ def fetch_all_media(config):
         logger.error(f"API request failed: {str(e)}")
         return []
 
-def fetch_new_media(config, state, last_scan=None):
-    """Fetch only new or updated media items since the last scan,
-    skipping only items that were actually unmonitored"""
-    
-    if not last_scan:
-        return fetch_all_media(config)
-    
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    # Convert ISO timestamp to date object for comparison
-    last_scan_date = date_parser.parse(last_scan)
-    # Ensure the datetime is timezone-naive for consistent comparison
-    if last_scan_date.tzinfo is not None:
-        last_scan_date = last_scan_date.replace(tzinfo=None)
-    
-    if config['service'] == 'radarr':
-        # Fetch all movies
-        all_media = fetch_all_media(config)
-        
-        # Filter to only include new or updated items, or items not yet unmonitored
-        new_media = []
-        for item in all_media:
-            # Skip only if previously unmonitored - THIS IS THE KEY CHANGE
-            if item['id'] in state['radarr'].get('unmonitored_ids', []):
-                continue
-                
-            # If the file isn't monitored in Radarr already, skip it
-            if not item.get('monitored', True):
-                # Add to unmonitored list if not already there
-                if item['id'] not in state['radarr'].get('unmonitored_ids', []):
-                    state['radarr']['unmonitored_ids'].append(item['id'])
-                continue
-            
-            # Include media with changes or new additions since last scan
-            include_item = False
-            
-            # Check if media was added after the last scan
-            if 'added' in item:
-                added_date = date_parser.parse(item['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_item = True
-            
-            # Also include items with recent file changes
-            if not include_item and 'movieFile' in item and item['movieFile'] and 'dateAdded' in item['movieFile']:
-                file_date = date_parser.parse(item['movieFile']['dateAdded'])
-                if file_date.tzinfo is not None:
-                    file_date = file_date.replace(tzinfo=None)
-                if file_date > last_scan_date:
-                    include_item = True
-            
-            # Include items that haven't been processed before or have changes
-            if include_item or item['id'] not in state['radarr'].get('processed_ids', []):
-                new_media.append(item)
-        
-        logger.info(f"Found {len(new_media)} movies to process (new/updated/not unmonitored)")
-        return new_media
-        
-    else:  # sonarr
-        # Fetch all series
-        all_series = fetch_all_media(config)
-        
-        # Get episodes added since last scan date or not yet unmonitored
-        series_to_process = []
-        for series in all_series:
-            # Skip if series is completely unmonitored and in our tracking
-            if series['id'] in state['sonarr'].get('unmonitored_ids', []):
-                continue
-                
-            # Check if series was added recently
-            include_series = False
-            if 'added' in series:
-                added_date = date_parser.parse(series['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_series = True
-            
-            # Check for episodes that need processing
-            if not include_series:
-                # Get episodes for all seasons
-                needs_processing = False
-                all_episodes = []
-                
-                # First check each season
-                for season in series.get('seasons', []):
-                    season_number = season.get('seasonNumber')
-                    
-                    # Skip if season is already unmonitored in our tracking
-                    if series['id'] in state['sonarr'].get('unmonitored_seasons', {}) and \
-                       season_number in state['sonarr']['unmonitored_seasons'].get(series['id'], []):
-                        continue
-                        
-                    # If season is not monitored in Sonarr, track it but skip
-                    if not season.get('monitored', True):
-                        # Initialize season tracking if needed
-                        if 'unmonitored_seasons' not in state['sonarr']:
-                            state['sonarr']['unmonitored_seasons'] = {}
-                        if series['id'] not in state['sonarr']['unmonitored_seasons']:
-                            state['sonarr']['unmonitored_seasons'][series['id']] = []
-                            
-                        # Add to our tracking if not already there
-                        if season_number not in state['sonarr']['unmonitored_seasons'][series['id']]:
-                            state['sonarr']['unmonitored_seasons'][series['id']].append(season_number)
-                            
-                        continue
-                    
-                    # Get episodes for this season
-                    episodes = get_episodes(config, series['id'], season_number)
-                    if episodes:
-                        all_episodes.extend(episodes)
-                
-                # Now check individual episodes
-                for episode in all_episodes:
-                    # Skip episodes already marked as unmonitored
-                    if episode['id'] in state['sonarr'].get('unmonitored_episode_ids', []):
-                        continue
-                        
-                    # If already unmonitored in Sonarr, record it but skip
-                    if not episode.get('monitored', True):
-                        if episode['id'] not in state['sonarr'].get('unmonitored_episode_ids', []):
-                            state['sonarr']['unmonitored_episode_ids'].append(episode['id'])
-                        continue
-                    
-                    if not episode.get('hasFile', False) or not episode.get('episodeFileId'):
-                        continue
-                    
-                    # New episode file added
-                    if 'episodeFile' in episode and 'dateAdded' in episode['episodeFile']:
-                        file_date = date_parser.parse(episode['episodeFile']['dateAdded'])
-                        if file_date.tzinfo is not None:
-                            file_date = file_date.replace(tzinfo=None)
-                        if file_date > last_scan_date:
-                            needs_processing = True
-                            break
-                    
-                    # Episode hasn't been processed yet
-                    if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                        needs_processing = True
-                        break
-                
-                if needs_processing:
-                    include_series = True
-            
-            # Include new or unprocessed series
-            if include_series or series['id'] not in state['sonarr'].get('processed_ids', []):
-                series_to_process.append(series)
-        
-        logger.info(f"Found {len(series_to_process)} series to process (new/updated/not unmonitored)")
-        return series_to_process
-
-def get_file_details(config, media_id, file_id=None):
-    """Get file details for a specific movie or series/episode"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    if config['service'] == 'radarr':
-        url = f"{api_url}/moviefile?movieId={media_id}"
-    else:  # sonarr
-        if file_id:
-            # Get a specific episode file
-            url = f"{api_url}/episodefile/{file_id}"
-            try:
-                response = requests.get(url, headers=headers, timeout=30)
-                response.raise_for_status()
-                return [response.json()]  # Return as a list for consistent handling
-            except requests.exceptions.RequestException as e:
-                if config.get('debug'):
-                    logger.debug(f"Failed to get episode file {file_id}: {str(e)}")
-                return []
-        else:
-            # Get all episode files for a series
-            url = f"{api_url}/episodefile?seriesId={media_id}"
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get file details: {str(e)}")
-        return []
-
-def get_seasons_for_series(config, series_id):
+def series_file_stats(series):
     """
-    Fetch all seasons for a series, including metadata on monitored status
-    and episode counts.
-    
-    Args:
-        config: Configuration dictionary with API details
-        series_id: ID of the series to fetch seasons for
-        
-    Returns:
-        list: List of seasons with metadata
+    File statistics Sonarr reports for a series, used to tell whether its files
+    changed since the last check. Returns None if the series has no statistics.
     """
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    try:
-        # Get the series first to access the seasons array
-        url = f"{api_url}/series/{series_id}"
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        series = response.json()
-        
-        if 'seasons' not in series:
-            logger.warning(f"No seasons array found for series ID {series_id}")
-            return []
-            
-        # Return the seasons array
-        return series['seasons']
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get seasons for series {series_id}: {str(e)}")
-        return []
+    statistics = series.get('statistics')
+    if not statistics:
+        return None
+    return [statistics.get('episodeFileCount'), statistics.get('sizeOnDisk')]
 
-def get_episodes(config, series_id, season_number=None):
-    """Fetch episodes for a series, optionally filtered by season (Sonarr only)"""
-    if config['service'] != 'sonarr':
-        return []
-        
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    url = f"{api_url}/episode?seriesId={series_id}"
-    
-    # Add retry logic for more resilience
-    max_retries = 3
-    retry_delay = 2  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            episodes = response.json()
-            
-            # Filter by season if specified
-            if season_number is not None:
-                episodes = [ep for ep in episodes if ep.get('seasonNumber') == season_number]
-                
-            # Keep only episodes with files
-            episodes_with_files = [ep for ep in episodes if ep.get('hasFile', False)]
-            
-            if config.get('debug'):
-                logger.debug(f"Found {len(episodes_with_files)}/{len(episodes)} episodes with files for season {season_number}")
-                
-            return episodes_with_files
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                logger.warning(f"API request failed, retrying in {retry_delay}s: {str(e)}")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                logger.error(f"Failed to get episodes after {max_retries} attempts: {str(e)}")
-                return []
-
-def get_release_group(file_path, config):
+def parse_date(value):
     """
-    Extract release group from file path using enhanced pattern matching.
-    
-    Works with a wide variety of naming conventions including:
-    - Standard: Movie.Title.2023.1080p.WEB-DL.DDP5.1.H.264-RELEASEGROUP
-    - Hyphenated: Movie Title (2023) [1080p] [WEB-DL] [DDP5.1] [H.264]-RELEASEGROUP
-    - Bracketed: Movie.Title.2023.1080p.BluRay.x264.[RELEASEGROUP]
-    - Multiple tags: Movie.Title.2023.1080p.[HDR10].[DV].[DDP5.1]-RELEASEGROUP
+    Parse an ISO 8601 date from the API or state file into a timezone-naive datetime.
+    datetime.fromisoformat handles the Radarr/Sonarr format directly and is far
+    cheaper than dateutil, which is kept as a fallback for anything else.
     """
-    # Get just the filename without the path
-    filename = os.path.basename(file_path)
-    
-    # First, remove the file extension
-    basename = os.path.splitext(filename)[0]
-    
-    if config.get('debug'):
-        logger.debug(f"Analyzing filename for release group: {basename}")
-    
-    # For troubleshooting, extract and log the last portion of the filename
-    # This helps identify patterns we might be missing
-    last_segment = basename.split('-')[-1] if '-' in basename else ''
-    if last_segment and config.get('debug'):
-        logger.debug(f"Last segment after hyphen: {last_segment}")
-    
-    # Common pattern structures for release groups
-    patterns = [
-        # Primary pattern: Release group at end preceded by hyphen (most common)
-        # Examples: "Movie Title-RELEASEGROUP", "Show.S01E01-RELEASEGROUP"
-        r'-([A-Za-z0-9._-]+)$',
-        
-        # Bracket pattern: [RELEASEGROUP] at the end
-        # Examples: "Movie Title [RELEASEGROUP]", "Show.S01E01 [RELEASEGROUP]"
-        r'\[([A-Za-z0-9._-]+)\]$',
-        
-        # Dot separated pattern: ending with .RELEASEGROUP
-        # Examples: "Movie.Title.2023.1080p.RELEASEGROUP", "Show.S01E01.RELEASEGROUP"
-        r'\.([A-Za-z0-9_-]{2,})$',
-        
-        # Common format with multi brackets: tags then group
-        # Examples: "Movie [1080p] [WEB-DL]-RELEASEGROUP"
-        r'\][\s]*-[\s]*([A-Za-z0-9._-]+)$',
-        
-        # Common torrent format with dots
-        # Examples: "Movie.Title.2023.1080p.WEB-DL.RELEASEGROUP"
-        r'(?:480p|720p|1080p|2160p|4k|bluray|web-dl|webrip|hdtv|xvid|aac|ac3|dts|bd5|bd9|bd25|bd50|bd66|bd100)(?:\.[^.]+)*\.([A-Za-z0-9_-]{2,})$',
-        
-        # Scene naming convention
-        # Examples: "Movie.Title.2023.1080p.WEB-DL.x264-RELEASEGROUP"
-        r'(?:x264|x265|h264|h265|hevc|xvid)[\s.]*-[\s.]*([A-Za-z0-9._-]+)(?:\..*)?$',
-        
-        # Handle brackets in the middle with hyphen after
-        # Examples: "Movie.Title.2023.[1080p]-RELEASEGROUP"
-        r'\][\s]*-[\s]*([A-Za-z0-9._-]+)(?:\..*)?$',
-        
-        # Quality patterns with release groups
-        # Examples: "Movie.Title.2023.1080p.RELEASEGROUP"
-        r'(?:480p|720p|1080p|2160p)\.([A-Za-z0-9._-]{2,})$',
-        
-        # Very liberal pattern to catch almost anything after the last dot
-        r'\.([A-Za-z0-9]{2,})$',
-        
-        # Fallback pattern for any group-like strings at the end
-        # This is less precise but might catch edge cases
-        r'(?:[\.\s\[\]\(\)\-]|^)([A-Za-z0-9]{2,})$'
-    ]
-    
-    # Try each pattern in order of specificity
-    for pattern in patterns:
-        match = re.search(pattern, basename, re.IGNORECASE)
-        if match:
-            group = match.group(1)
-            # Clean up the group name (remove trailing dots, etc)
-            group = group.rstrip('.')
-            
-            if config.get('debug'):
-                logger.debug(f"Found release group: {group} using pattern: {pattern}")
-            return group
-    
-    # Special handling for specific scene/p2p naming conventions
-    # This handles cases where the release group might be embedded in a complex pattern
-    scene_pattern = r'(?:\.|\-|\[|\s)((?:AMIABLE|SPARKS|GECKOS|DRONES|EVO|YIFY|YTS|RARBG)\b.*?)(?:\.|\]|\[|\-|$)'
-    match = re.search(scene_pattern, basename, re.IGNORECASE)
-    if match:
-        group = match.group(1)
-        if config.get('debug'):
-            logger.debug(f"Found release group using scene pattern: {group}")
-        return group
-        
-    # Check for common abbreviations that might be release groups
-    common_groups = ['yts', 'yify', 'rarbg', 'ettv', 'eztv', 'ctrlhd', 'ntb', 'web', 'web-dl']
-    for group in common_groups:
-        # Look for the group with word boundaries
-        pattern = r'(?:^|\W)(' + re.escape(group) + r')(?:$|\W)'
-        match = re.search(pattern, basename, re.IGNORECASE)
-        if match:
-            found_group = match.group(1)
-            if config.get('debug'):
-                logger.debug(f"Found common release group: {found_group}")
-            return found_group
-    
-    # Handle potential multi-word groups with spaces
-    space_pattern = r'-\s*([A-Za-z0-9]+(?: [A-Za-z0-9]+)+)'
-    match = re.search(space_pattern, basename)
-    if match:
-        group = match.group(1)
-        if config.get('debug'):
-            logger.debug(f"Found multi-word release group: {group}")
-        return group
-            
-    if config.get('debug'):
-        logger.debug(f"No release group found in: {basename}")
-    return None
-
-def save_state(state):
-    """Save the current state to file with enhanced reporting"""
-    try:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(state_file), exist_ok=True)
-        
-        # Create a backup of the current state file if it exists
-        if os.path.exists(state_file):
-            backup_file = f"{state_file}.bak"
-            shutil.copy2(state_file, backup_file)
-            
-        # Update the last scan timestamp
-        state['last_scan'] = datetime.now().isoformat()
-        
-        # Write the new state
-        with open(state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-            logger.info(f"Saved state file to {state_file}")
-            
-        # Log a summary of the current state
-        if logger.level <= logging.INFO:
-            summary = generate_state_summary(state)
-            for line in summary.split("\n"):
-                logger.info(line)
-                
-    except Exception as e:
-        logger.error(f"Error saving state file: {str(e)}")
-
-def fetch_all_media(config):
-    """Fetch all media items from Radarr or Sonarr"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    endpoint = "movie" if config['service'] == 'radarr' else "series"
-    url = f"{api_url}/{endpoint}"
-    
-    logger.info(f"Fetching all media items from {url}")
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        media_items = response.json()
-        
-        # Apply sample size limit if configured
-        if config.get('sample_size') and config['sample_size'] > 0:
-            original_count = len(media_items)
-            media_items = media_items[:config['sample_size']]
-            logger.info(f"Limiting from {original_count} to {len(media_items)} items for testing")
-            
-        return media_items
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed: {str(e)}")
-        return []
-
-def fetch_new_media(config, state, last_scan=None):
-    """Fetch only new or updated media items since the last scan,
-    skipping only items that were actually unmonitored"""
-    
-    if not last_scan:
-        return fetch_all_media(config)
-    
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    # Convert ISO timestamp to date object for comparison
-    last_scan_date = date_parser.parse(last_scan)
-    # Ensure the datetime is timezone-naive for consistent comparison
-    if last_scan_date.tzinfo is not None:
-        last_scan_date = last_scan_date.replace(tzinfo=None)
-    
-    if config['service'] == 'radarr':
-        # Fetch all movies
-        all_media = fetch_all_media(config)
-        
-        # Filter to only include new or updated items, or items not yet unmonitored
-        new_media = []
-        for item in all_media:
-            # Skip only if previously unmonitored - THIS IS THE KEY CHANGE
-            if item['id'] in state['radarr'].get('unmonitored_ids', []):
-                continue
-                
-            # If the file isn't monitored in Radarr already, skip it
-            if not item.get('monitored', True):
-                # Add to unmonitored list if not already there
-                if item['id'] not in state['radarr'].get('unmonitored_ids', []):
-                    state['radarr']['unmonitored_ids'].append(item['id'])
-                continue
-            
-            # Include media with changes or new additions since last scan
-            include_item = False
-            
-            # Check if media was added after the last scan
-            if 'added' in item:
-                added_date = date_parser.parse(item['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_item = True
-            
-            # Also include items with recent file changes
-            if not include_item and 'movieFile' in item and item['movieFile'] and 'dateAdded' in item['movieFile']:
-                file_date = date_parser.parse(item['movieFile']['dateAdded'])
-                if file_date.tzinfo is not None:
-                    file_date = file_date.replace(tzinfo=None)
-                if file_date > last_scan_date:
-                    include_item = True
-            
-            # Include items that haven't been processed before or have changes
-            if include_item or item['id'] not in state['radarr'].get('processed_ids', []):
-                new_media.append(item)
-        
-        logger.info(f"Found {len(new_media)} movies to process (new/updated/not unmonitored)")
-        return new_media
-        
-    else:  # sonarr
-        # Fetch all series
-        all_series = fetch_all_media(config)
-        
-        # Get episodes added since last scan date or not yet unmonitored
-        series_to_process = []
-        for series in all_series:
-            # Skip if series is completely unmonitored and in our tracking
-            if series['id'] in state['sonarr'].get('unmonitored_ids', []):
-                continue
-                
-            # Check if series was added recently
-            include_series = False
-            if 'added' in series:
-                added_date = date_parser.parse(series['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_series = True
-            
-            # Check for episodes that need processing
-            if not include_series:
-                # Get episodes for all seasons
-                needs_processing = False
-                all_episodes = []
-                
-                # First check each season
-                for season in series.get('seasons', []):
-                    season_number = season.get('seasonNumber')
-                    
-                    # Skip if season is already unmonitored in our tracking
-                    if series['id'] in state['sonarr'].get('unmonitored_seasons', {}) and \
-                       season_number in state['sonarr']['unmonitored_seasons'].get(series['id'], []):
-                        continue
-                        
-                    # If season is not monitored in Sonarr, track it but skip
-                    if not season.get('monitored', True):
-                        # Initialize season tracking if needed
-                        if 'unmonitored_seasons' not in state['sonarr']:
-                            state['sonarr']['unmonitored_seasons'] = {}
-                        if series['id'] not in state['sonarr']['unmonitored_seasons']:
-                            state['sonarr']['unmonitored_seasons'][series['id']] = []
-                            
-                        # Add to our tracking if not already there
-                        if season_number not in state['sonarr']['unmonitored_seasons'][series['id']]:
-                            state['sonarr']['unmonitored_seasons'][series['id']].append(season_number)
-                            
-                        continue
-                    
-                    # Get episodes for this season
-                    episodes = get_episodes(config, series['id'], season_number)
-                    if episodes:
-                        all_episodes.extend(episodes)
-                
-                # Now check individual episodes
-                for episode in all_episodes:
-                    # Skip episodes already marked as unmonitored
-                    if episode['id'] in state['sonarr'].get('unmonitored_episode_ids', []):
-                        continue
-                        
-                    # If already unmonitored in Sonarr, record it but skip
-                    if not episode.get('monitored', True):
-                        if episode['id'] not in state['sonarr'].get('unmonitored_episode_ids', []):
-                            state['sonarr']['unmonitored_episode_ids'].append(episode['id'])
-                        continue
-                    
-                    if not episode.get('hasFile', False) or not episode.get('episodeFileId'):
-                        continue
-                    
-                    # New episode file added
-                    if 'episodeFile' in episode and 'dateAdded' in episode['episodeFile']:
-                        file_date = date_parser.parse(episode['episodeFile']['dateAdded'])
-                        if file_date.tzinfo is not None:
-                            file_date = file_date.replace(tzinfo=None)
-                        if file_date > last_scan_date:
-                            needs_processing = True
-                            break
-                    
-                    # Episode hasn't been processed yet
-                    if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                        needs_processing = True
-                        break
-                
-                if needs_processing:
-                    include_series = True
-            
-            # Include new or unprocessed series
-            if include_series or series['id'] not in state['sonarr'].get('processed_ids', []):
-                series_to_process.append(series)
-        
-        logger.info(f"Found {len(series_to_process)} series to process (new/updated/not unmonitored)")
-        return series_to_process
-
-def get_file_details(config, media_id, file_id=None):
-    """Get file details for a specific movie or series/episode"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    if config['service'] == 'radarr':
-        url = f"{api_url}/moviefile?movieId={media_id}"
-    else:  # sonarr
-        if file_id:
-            # Get a specific episode file
-            url = f"{api_url}/episodefile/{file_id}"
-            try:
-                response = requests.get(url, headers=headers, timeout=30)
-                response.raise_for_status()
-                return [response.json()]  # Return as a list for consistent handling
-            except requests.exceptions.RequestException as e:
-                if config.get('debug'):
-                    logger.debug(f"Failed to get episode file {file_id}: {str(e)}")
-                return []
-        else:
-            # Get all episode files for a series
-            url = f"{api_url}/episodefile?seriesId={media_id}"
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get file details: {str(e)}")
-        return []
-
-def get_seasons_for_series(config, series_id):
-    """
-    Fetch all seasons for a series, including metadata on monitored status
-    and episode counts.
-    
-    Args:
-        config: Configuration dictionary with API details
-        series_id: ID of the series to fetch seasons for
-        
-    Returns:
-        list: List of seasons with metadata
-    """
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    try:
-        # Get the series first to access the seasons array
-        url = f"{api_url}/series/{series_id}"
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        series = response.json()
-        
-        if 'seasons' not in series:
-            logger.warning(f"No seasons array found for series ID {series_id}")
-            return []
-            
-        # Return the seasons array
-        return series['seasons']
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get seasons for series {series_id}: {str(e)}")
-        return []
-
-def get_episodes(config, series_id, season_number=None):
-    """Fetch episodes for a series, optionally filtered by season (Sonarr only)"""
-    if config['service'] != 'sonarr':
-        return []
-        
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    url = f"{api_url}/episode?seriesId={series_id}"
-    
-    # Add retry logic for more resilience
-    max_retries = 3
-    retry_delay = 2  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            episodes = response.json()
-            
-            # Filter by season if specified
-            if season_number is not None:
-                episodes = [ep for ep in episodes if ep.get('seasonNumber') == season_number]
-                
-            # Keep only episodes with files
-            episodes_with_files = [ep for ep in episodes if ep.get('hasFile', False)]
-            
-            if config.get('debug'):
-                logger.debug(f"Found {len(episodes_with_files)}/{len(episodes)} episodes with files for season {season_number}")
-                
-            return episodes_with_files
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                logger.warning(f"API request failed, retrying in {retry_delay}s: {str(e)}")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                logger.error(f"Failed to get episodes after {max_retries} attempts: {str(e)}")
-                return []
-
-def get_release_group(file_path, config):
-    """
-    Extract release group from file path using enhanced pattern matching.
-    
-    Works with a wide variety of naming conventions including:
-    - Standard: Movie.Title.2023.1080p.WEB-DL.DDP5.1.H.264-RELEASEGROUP
-    - Hyphenated: Movie Title (2023) [1080p] [WEB-DL] [DDP5.1] [H.264]-RELEASEGROUP
-    - Bracketed: Movie.Title.2023.1080p.BluRay.x264.[RELEASEGROUP]
-    - Multiple tags: Movie.Title.2023.1080p.[HDR10].[DV].[DDP5.1]-RELEASEGROUP
-    """
-    # Get just the filename without the path
-    filename = os.path.basename(file_path)
-    
-    # First, remove the file extension
-    basename = os.path.splitext(filename)[0]
-    
-    if config.get('debug'):
-        logger.debug(f"Analyzing filename for release group: {basename}")
-    
-    # For troubleshooting, extract and log the last portion of the filename
-    # This helps identify patterns we might be missing
-    last_segment = basename.split('-')[-1] if '-' in basename else ''
-    if last_segment and config.get('debug'):
-        logger.debug(f"Last segment after hyphen: {last_segment}")
-
-def save_state(state):
-    """Save the current state to file with enhanced reporting"""
-    try:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(state_file), exist_ok=True)
-        
-        # Create a backup of the current state file if it exists
-        if os.path.exists(state_file):
-            backup_file = f"{state_file}.bak"
-            shutil.copy2(state_file, backup_file)
-            
-        # Update the last scan timestamp
-        state['last_scan'] = datetime.now().isoformat()
-        
-        # Write the new state
-        with open(state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-            logger.info(f"Saved state file to {state_file}")
-            
-        # Log a summary of the current state
-        if logger.level <= logging.INFO:
-            summary = generate_state_summary(state)
-            for line in summary.split("\n"):
-                logger.info(line)
-                
-    except Exception as e:
-        logger.error(f"Error saving state file: {str(e)}")
-
-def fetch_all_media(config):
-    """Fetch all media items from Radarr or Sonarr"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    endpoint = "movie" if config['service'] == 'radarr' else "series"
-    url = f"{api_url}/{endpoint}"
-    
-    logger.info(f"Fetching all media items from {url}")
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        media_items = response.json()
-        
-        # Apply sample size limit if configured
-        if config.get('sample_size') and config['sample_size'] > 0:
-            original_count = len(media_items)
-            media_items = media_items[:config['sample_size']]
-            logger.info(f"Limiting from {original_count} to {len(media_items)} items for testing")
-            
-        return media_items
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed: {str(e)}")
-        return []
-
-def fetch_new_media(config, state, last_scan=None):
-    """Fetch only new or updated media items since the last scan,
-    skipping only items that were actually unmonitored"""
-    
-    if not last_scan:
-        return fetch_all_media(config)
-    
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    # Convert ISO timestamp to date object for comparison
-    last_scan_date = date_parser.parse(last_scan)
-    # Ensure the datetime is timezone-naive for consistent comparison
-    if last_scan_date.tzinfo is not None:
-        last_scan_date = last_scan_date.replace(tzinfo=None)
-    
-    if config['service'] == 'radarr':
-        # Fetch all movies
-        all_media = fetch_all_media(config)
-        
-        # Filter to only include new or updated items, or items not yet unmonitored
-        new_media = []
-        for item in all_media:
-            # Skip only if previously unmonitored - THIS IS THE KEY CHANGE
-            if item['id'] in state['radarr'].get('unmonitored_ids', []):
-                continue
-                
-            # If the file isn't monitored in Radarr already, skip it
-            if not item.get('monitored', True):
-                # Add to unmonitored list if not already there
-                if item['id'] not in state['radarr'].get('unmonitored_ids', []):
-                    state['radarr']['unmonitored_ids'].append(item['id'])
-                continue
-            
-            # Include media with changes or new additions since last scan
-            include_item = False
-            
-            # Check if media was added after the last scan
-            if 'added' in item:
-                added_date = date_parser.parse(item['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_item = True
-            
-            # Also include items with recent file changes
-            if not include_item and 'movieFile' in item and item['movieFile'] and 'dateAdded' in item['movieFile']:
-                file_date = date_parser.parse(item['movieFile']['dateAdded'])
-                if file_date.tzinfo is not None:
-                    file_date = file_date.replace(tzinfo=None)
-                if file_date > last_scan_date:
-                    include_item = True
-            
-            # Include items that haven't been processed before or have changes
-            if include_item or item['id'] not in state['radarr'].get('processed_ids', []):
-                new_media.append(item)
-        
-        logger.info(f"Found {len(new_media)} movies to process (new/updated/not unmonitored)")
-        return new_media
-        
-    else:  # sonarr
-        # Fetch all series
-        all_series = fetch_all_media(config)
-        
-        # Get episodes added since last scan date or not yet unmonitored
-        series_to_process = []
-        for series in all_series:
-            # Skip if series is completely unmonitored and in our tracking
-            if series['id'] in state['sonarr'].get('unmonitored_ids', []):
-                continue
-                
-            # Check if series was added recently
-            include_series = False
-            if 'added' in series:
-                added_date = date_parser.parse(series['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_series = True
-            
-            # Check for episodes that need processing
-            if not include_series:
-                # Get episodes for all seasons
-                needs_processing = False
-                all_episodes = []
-                
-                # First check each season
-                for season in series.get('seasons', []):
-                    season_number = season.get('seasonNumber')
-                    
-                    # Skip if season is already unmonitored in our tracking
-                    if series['id'] in state['sonarr'].get('unmonitored_seasons', {}) and \
-                       season_number in state['sonarr']['unmonitored_seasons'].get(series['id'], []):
-                        continue
-                        
-                    # If season is not monitored in Sonarr, track it but skip
-                    if not season.get('monitored', True):
-                        # Initialize season tracking if needed
-                        if 'unmonitored_seasons' not in state['sonarr']:
-                            state['sonarr']['unmonitored_seasons'] = {}
-                        if series['id'] not in state['sonarr']['unmonitored_seasons']:
-                            state['sonarr']['unmonitored_seasons'][series['id']] = []
-                            
-                        # Add to our tracking if not already there
-                        if season_number not in state['sonarr']['unmonitored_seasons'][series['id']]:
-                            state['sonarr']['unmonitored_seasons'][series['id']].append(season_number)
-                            
-                        continue
-                    
-                    # Get episodes for this season
-                    episodes = get_episodes(config, series['id'], season_number)
-                    if episodes:
-                        all_episodes.extend(episodes)
-                
-                # Now check individual episodes
-                for episode in all_episodes:
-                    # Skip episodes already marked as unmonitored
-                    if episode['id'] in state['sonarr'].get('unmonitored_episode_ids', []):
-                        continue
-                        
-                    # If already unmonitored in Sonarr, record it but skip
-                    if not episode.get('monitored', True):
-                        if episode['id'] not in state['sonarr'].get('unmonitored_episode_ids', []):
-                            state['sonarr']['unmonitored_episode_ids'].append(episode['id'])
-                        continue
-                    
-                    if not episode.get('hasFile', False) or not episode.get('episodeFileId'):
-                        continue
-                    
-                    # New episode file added
-                    if 'episodeFile' in episode and 'dateAdded' in episode['episodeFile']:
-                        file_date = date_parser.parse(episode['episodeFile']['dateAdded'])
-                        if file_date.tzinfo is not None:
-                            file_date = file_date.replace(tzinfo=None)
-                        if file_date > last_scan_date:
-                            needs_processing = True
-                            break
-                    
-                    # Episode hasn't been processed yet
-                    if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                        needs_processing = True
-                        break
-                
-                if needs_processing:
-                    include_series = True
-            
-            # Include new or unprocessed series
-            if include_series or series['id'] not in state['sonarr'].get('processed_ids', []):
-                series_to_process.append(series)
-        
-        logger.info(f"Found {len(series_to_process)} series to process (new/updated/not unmonitored)")
-        return series_to_process
-
-def get_file_details(config, media_id, file_id=None):
-    """Get file details for a specific movie or series/episode"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    if config['service'] == 'radarr':
-        url = f"{api_url}/moviefile?movieId={media_id}"
-    else:  # sonarr
-        if file_id:
-            # Get a specific episode file
-            url = f"{api_url}/episodefile/{file_id}"
-            try:
-                response = requests.get(url, headers=headers, timeout=30)
-                response.raise_for_status()
-                return [response.json()]  # Return as a list for consistent handling
-            except requests.exceptions.RequestException as e:
-                if config.get('debug'):
-                    logger.debug(f"Failed to get episode file {file_id}: {str(e)}")
-                return []
-        else:
-            # Get all episode files for a series
-            url = f"{api_url}/episodefile?seriesId={media_id}"
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get file details: {str(e)}")
-        return []
-
-def get_seasons_for_series(config, series_id):
-    """
-    Fetch all seasons for a series, including metadata on monitored status
-    and episode counts.
-    
-    Args:
-        config: Configuration dictionary with API details
-        series_id: ID of the series to fetch seasons for
-        
-    Returns:
-        list: List of seasons with metadata
-    """
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    try:
-        # Get the series first to access the seasons array
-        url = f"{api_url}/series/{series_id}"
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        series = response.json()
-        
-        if 'seasons' not in series:
-            logger.warning(f"No seasons array found for series ID {series_id}")
-            return []
-            
-        # Return the seasons array
-        return series['seasons']
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get seasons for series {series_id}: {str(e)}")
-        return []
-
-def get_episodes(config, series_id, season_number=None):
-    """Fetch episodes for a series, optionally filtered by season (Sonarr only)"""
-    if config['service'] != 'sonarr':
-        return []
-        
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    url = f"{api_url}/episode?seriesId={series_id}"
-    
-    # Add retry logic for more resilience
-    max_retries = 3
-    retry_delay = 2  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            episodes = response.json()
-            
-            # Filter by season if specified
-            if season_number is not None:
-                episodes = [ep for ep in episodes if ep.get('seasonNumber') == season_number]
-                
-            # Keep only episodes with files
-            episodes_with_files = [ep for ep in episodes if ep.get('hasFile', False)]
-            
-            if config.get('debug'):
-                logger.debug(f"Found {len(episodes_with_files)}/{len(episodes)} episodes with files for season {season_number}")
-                
-            return episodes_with_files
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                logger.warning(f"API request failed, retrying in {retry_delay}s: {str(e)}")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                logger.error(f"Failed to get episodes after {max_retries} attempts: {str(e)}")
-                return []
-
-def get_release_group(file_path, config):
-    """
-    Extract release group from file path using enhanced pattern matching.
-    
-    Works with a wide variety of naming conventions including:
-    - Standard: Movie.Title.2023.1080p.WEB-DL.DDP5.1.H.264-RELEASEGROUP
-    - Hyphenated: Movie Title (2023) [1080p] [WEB-DL] [DDP5.1] [H.264]-RELEASEGROUP
-    - Bracketed: Movie.Title.2023.1080p.BluRay.x264.[RELEASEGROUP]
-    - Multiple tags: Movie.Title.2023.1080p.[HDR10].[DV].[DDP5.1]-RELEASEGROUP
-    """
-    # Get just the filename without the path
-    filename = os.path.basename(file_path)
-    
-    # First, remove the file extension
-    basename = os.path.splitext(filename)[0]
-    
-    if config.get('debug'):
-        logger.debug(f"Analyzing filename for release group: {basename}")
-    
-    # For troubleshooting, extract and log the last portion of the filename
-    # This helps identify patterns we might be missing
-    last_segment = basename.split('-')[-1] if '-' in basename else ''
-    if last_segment and config.get('debug'):
-        logger.debug(f"Last segment after hyphen: {last_segment}")
-
-def save_state(state):
-    """Save the current state to file with enhanced reporting"""
-    try:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(state_file), exist_ok=True)
-        
-        # Create a backup of the current state file if it exists
-        if os.path.exists(state_file):
-            backup_file = f"{state_file}.bak"
-            shutil.copy2(state_file, backup_file)
-            
-        # Update the last scan timestamp
-        state['last_scan'] = datetime.now().isoformat()
-        
-        # Write the new state
-        with open(state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-            logger.info(f"Saved state file to {state_file}")
-            
-        # Log a summary of the current state
-        if logger.level <= logging.INFO:
-            summary = generate_state_summary(state)
-            for line in summary.split("\n"):
-                logger.info(line)
-                
-    except Exception as e:
-        logger.error(f"Error saving state file: {str(e)}")
-
-def fetch_all_media(config):
-    """Fetch all media items from Radarr or Sonarr"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    endpoint = "movie" if config['service'] == 'radarr' else "series"
-    url = f"{api_url}/{endpoint}"
-    
-    logger.info(f"Fetching all media items from {url}")
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        media_items = response.json()
-        
-        # Apply sample size limit if configured
-        if config.get('sample_size') and config['sample_size'] > 0:
-            original_count = len(media_items)
-            media_items = media_items[:config['sample_size']]
-            logger.info(f"Limiting from {original_count} to {len(media_items)} items for testing")
-            
-        return media_items
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed: {str(e)}")
-        return []
-
-def fetch_new_media(config, state, last_scan=None):
-    """Fetch only new or updated media items since the last scan,
-    skipping only items that were actually unmonitored"""
-    
-    if not last_scan:
-        return fetch_all_media(config)
-    
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    # Convert ISO timestamp to date object for comparison
-    last_scan_date = date_parser.parse(last_scan)
-    # Ensure the datetime is timezone-naive for consistent comparison
-    if last_scan_date.tzinfo is not None:
-        last_scan_date = last_scan_date.replace(tzinfo=None)
-    
-    if config['service'] == 'radarr':
-        # Fetch all movies
-        all_media = fetch_all_media(config)
-        
-        # Filter to only include new or updated items, or items not yet unmonitored
-        new_media = []
-        for item in all_media:
-            # Skip only if previously unmonitored - THIS IS THE KEY CHANGE
-            if item['id'] in state['radarr'].get('unmonitored_ids', []):
-                continue
-                
-            # If the file isn't monitored in Radarr already, skip it
-            if not item.get('monitored', True):
-                # Add to unmonitored list if not already there
-                if item['id'] not in state['radarr'].get('unmonitored_ids', []):
-                    state['radarr']['unmonitored_ids'].append(item['id'])
-                continue
-            
-            # Include media with changes or new additions since last scan
-            include_item = False
-            
-            # Check if media was added after the last scan
-            if 'added' in item:
-                added_date = date_parser.parse(item['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_item = True
-            
-            # Also include items with recent file changes
-            if not include_item and 'movieFile' in item and item['movieFile'] and 'dateAdded' in item['movieFile']:
-                file_date = date_parser.parse(item['movieFile']['dateAdded'])
-                if file_date.tzinfo is not None:
-                    file_date = file_date.replace(tzinfo=None)
-                if file_date > last_scan_date:
-                    include_item = True
-            
-            # Include items that haven't been processed before or have changes
-            if include_item or item['id'] not in state['radarr'].get('processed_ids', []):
-                new_media.append(item)
-        
-        logger.info(f"Found {len(new_media)} movies to process (new/updated/not unmonitored)")
-        return new_media
-        
-    else:  # sonarr
-        # Fetch all series
-        all_series = fetch_all_media(config)
-        
-        # Get episodes added since last scan date or not yet unmonitored
-        series_to_process = []
-        for series in all_series:
-            # Skip if series is completely unmonitored and in our tracking
-            if series['id'] in state['sonarr'].get('unmonitored_ids', []):
-                continue
-                
-            # Check if series was added recently
-            include_series = False
-            if 'added' in series:
-                added_date = date_parser.parse(series['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_series = True
-            
-            # Check for episodes that need processing
-            if not include_series:
-                # Get episodes for all seasons
-                needs_processing = False
-                all_episodes = []
-                
-                # First check each season
-                for season in series.get('seasons', []):
-                    season_number = season.get('seasonNumber')
-                    
-                    # Skip if season is already unmonitored in our tracking
-                    if series['id'] in state['sonarr'].get('unmonitored_seasons', {}) and \
-                       season_number in state['sonarr']['unmonitored_seasons'].get(series['id'], []):
-                        continue
-                        
-                    # If season is not monitored in Sonarr, track it but skip
-                    if not season.get('monitored', True):
-                        # Initialize season tracking if needed
-                        if 'unmonitored_seasons' not in state['sonarr']:
-                            state['sonarr']['unmonitored_seasons'] = {}
-                        if series['id'] not in state['sonarr']['unmonitored_seasons']:
-                            state['sonarr']['unmonitored_seasons'][series['id']] = []
-                            
-                        # Add to our tracking if not already there
-                        if season_number not in state['sonarr']['unmonitored_seasons'][series['id']]:
-                            state['sonarr']['unmonitored_seasons'][series['id']].append(season_number)
-                            
-                        continue
-                    
-                    # Get episodes for this season
-                    episodes = get_episodes(config, series['id'], season_number)
-                    if episodes:
-                        all_episodes.extend(episodes)
-                
-                # Now check individual episodes
-                for episode in all_episodes:
-                    # Skip episodes already marked as unmonitored
-                    if episode['id'] in state['sonarr'].get('unmonitored_episode_ids', []):
-                        continue
-                        
-                    # If already unmonitored in Sonarr, record it but skip
-                    if not episode.get('monitored', True):
-                        if episode['id'] not in state['sonarr'].get('unmonitored_episode_ids', []):
-                            state['sonarr']['unmonitored_episode_ids'].append(episode['id'])
-                        continue
-                    
-                    if not episode.get('hasFile', False) or not episode.get('episodeFileId'):
-                        continue
-                    
-                    # New episode file added
-                    if 'episodeFile' in episode and 'dateAdded' in episode['episodeFile']:
-                        file_date = date_parser.parse(episode['episodeFile']['dateAdded'])
-                        if file_date.tzinfo is not None:
-                            file_date = file_date.replace(tzinfo=None)
-                        if file_date > last_scan_date:
-                            needs_processing = True
-                            break
-                    
-                    # Episode hasn't been processed yet
-                    if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                        needs_processing = True
-                        break
-                
-                if needs_processing:
-                    include_series = True
-            
-            # Include new or unprocessed series
-            if include_series or series['id'] not in state['sonarr'].get('processed_ids', []):
-                series_to_process.append(series)
-        
-        logger.info(f"Found {len(series_to_process)} series to process (new/updated/not unmonitored)")
-        return series_to_process
-
-def get_file_details(config, media_id, file_id=None):
-    """Get file details for a specific movie or series/episode"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    if config['service'] == 'radarr':
-        url = f"{api_url}/moviefile?movieId={media_id}"
-    else:  # sonarr
-        if file_id:
-            # Get a specific episode file
-            url = f"{api_url}/episodefile/{file_id}"
-            try:
-                response = requests.get(url, headers=headers, timeout=30)
-                response.raise_for_status()
-                return [response.json()]  # Return as a list for consistent handling
-            except requests.exceptions.RequestException as e:
-                if config.get('debug'):
-                    logger.debug(f"Failed to get episode file {file_id}: {str(e)}")
-                return []
-        else:
-            # Get all episode files for a series
-            url = f"{api_url}/episodefile?seriesId={media_id}"
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get file details: {str(e)}")
-        return []
-
-def get_seasons_for_series(config, series_id):
-    """
-    Fetch all seasons for a series, including metadata on monitored status
-    and episode counts.
-    
-    Args:
-        config: Configuration dictionary with API details
-        series_id: ID of the series to fetch seasons for
-        
-    Returns:
-        list: List of seasons with metadata
-    """
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    try:
-        # Get the series first to access the seasons array
-        url = f"{api_url}/series/{series_id}"
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        series = response.json()
-        
-        if 'seasons' not in series:
-            logger.warning(f"No seasons array found for series ID {series_id}")
-            return []
-            
-        # Return the seasons array
-        return series['seasons']
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get seasons for series {series_id}: {str(e)}")
-        return []
-
-def get_episodes(config, series_id, season_number=None):
-    """Fetch episodes for a series, optionally filtered by season (Sonarr only)"""
-    if config['service'] != 'sonarr':
-        return []
-        
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    url = f"{api_url}/episode?seriesId={series_id}"
-    
-    # Add retry logic for more resilience
-    max_retries = 3
-    retry_delay = 2  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            episodes = response.json()
-            
-            # Filter by season if specified
-            if season_number is not None:
-                episodes = [ep for ep in episodes if ep.get('seasonNumber') == season_number]
-                
-            # Keep only episodes with files
-            episodes_with_files = [ep for ep in episodes if ep.get('hasFile', False)]
-            
-            if config.get('debug'):
-                logger.debug(f"Found {len(episodes_with_files)}/{len(episodes)} episodes with files for season {season_number}")
-                
-            return episodes_with_files
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                logger.warning(f"API request failed, retrying in {retry_delay}s: {str(e)}")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                logger.error(f"Failed to get episodes after {max_retries} attempts: {str(e)}")
-                return []
-
-def get_release_group(file_path, config):
-    """
-    Extract release group from file path using enhanced pattern matching.
-    
-    Works with a wide variety of naming conventions including:
-    - Standard: Movie.Title.2023.1080p.WEB-DL.DDP5.1.H.264-RELEASEGROUP
-    - Hyphenated: Movie Title (2023) [1080p] [WEB-DL] [DDP5.1] [H.264]-RELEASEGROUP
-    - Bracketed: Movie.Title.2023.1080p.BluRay.x264.[RELEASEGROUP]
-    - Multiple tags: Movie.Title.2023.1080p.[HDR10].[DV].[DDP5.1]-RELEASEGROUP
-    """
-    # Get just the filename without the path
-    filename = os.path.basename(file_path)
-    
-    # First, remove the file extension
-    basename = os.path.splitext(filename)[0]
-    
-    if config.get('debug'):
-        logger.debug(f"Analyzing filename for release group: {basename}")
-    
-    # For troubleshooting, extract and log the last portion of the filename
-    # This helps identify patterns we might be missing
-    last_segment = basename.split('-')[-1] if '-' in basename else ''
-    if last_segment and config.get('debug'):
-        logger.debug(f"Last segment after hyphen: {last_segment}")
-
-def save_state(state):
-    """Save the current state to file with enhanced reporting"""
-    try:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(state_file), exist_ok=True)
-        
-        # Create a backup of the current state file if it exists
-        if os.path.exists(state_file):
-            backup_file = f"{state_file}.bak"
-            shutil.copy2(state_file, backup_file)
-            
-        # Update the last scan timestamp
-        state['last_scan'] = datetime.now().isoformat()
-        
-        # Write the new state
-        with open(state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-            logger.info(f"Saved state file to {state_file}")
-            
-        # Log a summary of the current state
-        if logger.level <= logging.INFO:
-            summary = generate_state_summary(state)
-            for line in summary.split("\n"):
-                logger.info(line)
-                
-    except Exception as e:
-        logger.error(f"Error saving state file: {str(e)}")
-
-def fetch_all_media(config):
-    """Fetch all media items from Radarr or Sonarr"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    endpoint = "movie" if config['service'] == 'radarr' else "series"
-    url = f"{api_url}/{endpoint}"
-    
-    logger.info(f"Fetching all media items from {url}")
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        media_items = response.json()
-        
-        # Apply sample size limit if configured
-        if config.get('sample_size') and config['sample_size'] > 0:
-            original_count = len(media_items)
-            media_items = media_items[:config['sample_size']]
-            logger.info(f"Limiting from {original_count} to {len(media_items)} items for testing")
-            
-        return media_items
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed: {str(e)}")
-        return []
-
-def fetch_new_media(config, state, last_scan=None):
-    """Fetch only new or updated media items since the last scan,
-    skipping only items that were actually unmonitored"""
-    
-    if not last_scan:
-        return fetch_all_media(config)
-    
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    # Convert ISO timestamp to date object for comparison
-    last_scan_date = date_parser.parse(last_scan)
-    # Ensure the datetime is timezone-naive for consistent comparison
-    if last_scan_date.tzinfo is not None:
-        last_scan_date = last_scan_date.replace(tzinfo=None)
-    
-    if config['service'] == 'radarr':
-        # Fetch all movies
-        all_media = fetch_all_media(config)
-        
-        # Filter to only include new or updated items, or items not yet unmonitored
-        new_media = []
-        for item in all_media:
-            # Skip only if previously unmonitored - THIS IS THE KEY CHANGE
-            if item['id'] in state['radarr'].get('unmonitored_ids', []):
-                continue
-                
-            # If the file isn't monitored in Radarr already, skip it
-            if not item.get('monitored', True):
-                # Add to unmonitored list if not already there
-                if item['id'] not in state['radarr'].get('unmonitored_ids', []):
-                    state['radarr']['unmonitored_ids'].append(item['id'])
-                continue
-            
-            # Include media with changes or new additions since last scan
-            include_item = False
-            
-            # Check if media was added after the last scan
-            if 'added' in item:
-                added_date = date_parser.parse(item['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_item = True
-            
-            # Also include items with recent file changes
-            if not include_item and 'movieFile' in item and item['movieFile'] and 'dateAdded' in item['movieFile']:
-                file_date = date_parser.parse(item['movieFile']['dateAdded'])
-                if file_date.tzinfo is not None:
-                    file_date = file_date.replace(tzinfo=None)
-                if file_date > last_scan_date:
-                    include_item = True
-            
-            # Include items that haven't been processed before or have changes
-            if include_item or item['id'] not in state['radarr'].get('processed_ids', []):
-                new_media.append(item)
-        
-        logger.info(f"Found {len(new_media)} movies to process (new/updated/not unmonitored)")
-        return new_media
-        
-    else:  # sonarr
-        # Fetch all series
-        all_series = fetch_all_media(config)
-        
-        # Get episodes added since last scan date or not yet unmonitored
-        series_to_process = []
-        for series in all_series:
-            # Skip if series is completely unmonitored and in our tracking
-            if series['id'] in state['sonarr'].get('unmonitored_ids', []):
-                continue
-                
-            # Check if series was added recently
-            include_series = False
-            if 'added' in series:
-                added_date = date_parser.parse(series['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_series = True
-            
-            # Check for episodes that need processing
-            if not include_series:
-                # Get episodes for all seasons
-                needs_processing = False
-                all_episodes = []
-                
-                # First check each season
-                for season in series.get('seasons', []):
-                    season_number = season.get('seasonNumber')
-                    
-                    # Skip if season is already unmonitored in our tracking
-                    if series['id'] in state['sonarr'].get('unmonitored_seasons', {}) and \
-                       season_number in state['sonarr']['unmonitored_seasons'].get(series['id'], []):
-                        continue
-                        
-                    # If season is not monitored in Sonarr, track it but skip
-                    if not season.get('monitored', True):
-                        # Initialize season tracking if needed
-                        if 'unmonitored_seasons' not in state['sonarr']:
-                            state['sonarr']['unmonitored_seasons'] = {}
-                        if series['id'] not in state['sonarr']['unmonitored_seasons']:
-                            state['sonarr']['unmonitored_seasons'][series['id']] = []
-                            
-                        # Add to our tracking if not already there
-                        if season_number not in state['sonarr']['unmonitored_seasons'][series['id']]:
-                            state['sonarr']['unmonitored_seasons'][series['id']].append(season_number)
-                            
-                        continue
-                    
-                    # Get episodes for this season
-                    episodes = get_episodes(config, series['id'], season_number)
-                    if episodes:
-                        all_episodes.extend(episodes)
-                
-                # Now check individual episodes
-                for episode in all_episodes:
-                    # Skip episodes already marked as unmonitored
-                    if episode['id'] in state['sonarr'].get('unmonitored_episode_ids', []):
-                        continue
-                        
-                    # If already unmonitored in Sonarr, record it but skip
-                    if not episode.get('monitored', True):
-                        if episode['id'] not in state['sonarr'].get('unmonitored_episode_ids', []):
-                            state['sonarr']['unmonitored_episode_ids'].append(episode['id'])
-                        continue
-                    
-                    if not episode.get('hasFile', False) or not episode.get('episodeFileId'):
-                        continue
-                    
-                    # New episode file added
-                    if 'episodeFile' in episode and 'dateAdded' in episode['episodeFile']:
-                        file_date = date_parser.parse(episode['episodeFile']['dateAdded'])
-                        if file_date.tzinfo is not None:
-                            file_date = file_date.replace(tzinfo=None)
-                        if file_date > last_scan_date:
-                            needs_processing = True
-                            break
-                    
-                    # Episode hasn't been processed yet
-                    if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                        needs_processing = True
-                        break
-                
-                if needs_processing:
-                    include_series = True
-            
-            # Include new or unprocessed series
-            if include_series or series['id'] not in state['sonarr'].get('processed_ids', []):
-                series_to_process.append(series)
-        
-        logger.info(f"Found {len(series_to_process)} series to process (new/updated/not unmonitored)")
-        return series_to_process
-
-def get_file_details(config, media_id, file_id=None):
-    """Get file details for a specific movie or series/episode"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    if config['service'] == 'radarr':
-        url = f"{api_url}/moviefile?movieId={media_id}"
-    else:  # sonarr
-        if file_id:
-            # Get a specific episode file
-            url = f"{api_url}/episodefile/{file_id}"
-            try:
-                response = requests.get(url, headers=headers, timeout=30)
-                response.raise_for_status()
-                return [response.json()]  # Return as a list for consistent handling
-            except requests.exceptions.RequestException as e:
-                if config.get('debug'):
-                    logger.debug(f"Failed to get episode file {file_id}: {str(e)}")
-                return []
-        else:
-            # Get all episode files for a series
-            url = f"{api_url}/episodefile?seriesId={media_id}"
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get file details: {str(e)}")
-        return []
-
-def get_seasons_for_series(config, series_id):
-    """
-    Fetch all seasons for a series, including metadata on monitored status
-    and episode counts.
-    
-    Args:
-        config: Configuration dictionary with API details
-        series_id: ID of the series to fetch seasons for
-        
-    Returns:
-        list: List of seasons with metadata
-    """
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    try:
-        # Get the series first to access the seasons array
-        url = f"{api_url}/series/{series_id}"
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        series = response.json()
-        
-        if 'seasons' not in series:
-            logger.warning(f"No seasons array found for series ID {series_id}")
-            return []
-            
-        # Return the seasons array
-        return series['seasons']
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get seasons for series {series_id}: {str(e)}")
-        return []
-
-def get_episodes(config, series_id, season_number=None):
-    """Fetch episodes for a series, optionally filtered by season (Sonarr only)"""
-    if config['service'] != 'sonarr':
-        return []
-        
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    url = f"{api_url}/episode?seriesId={series_id}"
-    
-    # Add retry logic for more resilience
-    max_retries = 3
-    retry_delay = 2  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            episodes = response.json()
-            
-            # Filter by season if specified
-            if season_number is not None:
-                episodes = [ep for ep in episodes if ep.get('seasonNumber') == season_number]
-                
-            # Keep only episodes with files
-            episodes_with_files = [ep for ep in episodes if ep.get('hasFile', False)]
-            
-            if config.get('debug'):
-                logger.debug(f"Found {len(episodes_with_files)}/{len(episodes)} episodes with files for season {season_number}")
-                
-            return episodes_with_files
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                logger.warning(f"API request failed, retrying in {retry_delay}s: {str(e)}")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                logger.error(f"Failed to get episodes after {max_retries} attempts: {str(e)}")
-                return []
-
-def get_release_group(file_path, config):
-    """
-    Extract release group from file path using enhanced pattern matching.
-    
-    Works with a wide variety of naming conventions including:
-    - Standard: Movie.Title.2023.1080p.WEB-DL.DDP5.1.H.264-RELEASEGROUP
-    - Hyphenated: Movie Title (2023) [1080p] [WEB-DL] [DDP5.1] [H.264]-RELEASEGROUP
-    - Bracketed: Movie.Title.2023.1080p.BluRay.x264.[RELEASEGROUP]
-    - Multiple tags: Movie.Title.2023.1080p.[HDR10].[DV].[DDP5.1]-RELEASEGROUP
-    """
-    # Get just the filename without the path
-    filename = os.path.basename(file_path)
-    
-    # First, remove the file extension
-    basename = os.path.splitext(filename)[0]
-    
-    if config.get('debug'):
-        logger.debug(f"Analyzing filename for release group: {basename}")
-    
-    # For troubleshooting, extract and log the last portion of the filename
-    # This helps identify patterns we might be missing
-    last_segment = basename.split('-')[-1] if '-' in basename else ''
-    if last_segment and config.get('debug'):
-        logger.debug(f"Last segment after hyphen: {last_segment}")
-
-def save_state(state):
-    """Save the current state to file with enhanced reporting"""
-    try:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(state_file), exist_ok=True)
-        
-        # Create a backup of the current state file if it exists
-        if os.path.exists(state_file):
-            backup_file = f"{state_file}.bak"
-            shutil.copy2(state_file, backup_file)
-            
-        # Update the last scan timestamp
-        state['last_scan'] = datetime.now().isoformat()
-        
-        # Write the new state
-        with open(state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-            logger.info(f"Saved state file to {state_file}")
-            
-        # Log a summary of the current state
-        if logger.level <= logging.INFO:
-            summary = generate_state_summary(state)
-            for line in summary.split("\n"):
-                logger.info(line)
-                
-    except Exception as e:
-        logger.error(f"Error saving state file: {str(e)}")
-
-def fetch_all_media(config):
-    """Fetch all media items from Radarr or Sonarr"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    endpoint = "movie" if config['service'] == 'radarr' else "series"
-    url = f"{api_url}/{endpoint}"
-    
-    logger.info(f"Fetching all media items from {url}")
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        media_items = response.json()
-        
-        # Apply sample size limit if configured
-        if config.get('sample_size') and config['sample_size'] > 0:
-            original_count = len(media_items)
-            media_items = media_items[:config['sample_size']]
-            logger.info(f"Limiting from {original_count} to {len(media_items)} items for testing")
-            
-        return media_items
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed: {str(e)}")
-        return []
-
-def fetch_new_media(config, state, last_scan=None):
-    """Fetch only new or updated media items since the last scan,
-    skipping only items that were actually unmonitored"""
-    
-    if not last_scan:
-        return fetch_all_media(config)
-    
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    # Convert ISO timestamp to date object for comparison
-    last_scan_date = date_parser.parse(last_scan)
-    # Ensure the datetime is timezone-naive for consistent comparison
-    if last_scan_date.tzinfo is not None:
-        last_scan_date = last_scan_date.replace(tzinfo=None)
-    
-    if config['service'] == 'radarr':
-        # Fetch all movies
-        all_media = fetch_all_media(config)
-        
-        # Filter to only include new or updated items, or items not yet unmonitored
-        new_media = []
-        for item in all_media:
-            # Skip only if previously unmonitored - THIS IS THE KEY CHANGE
-            if item['id'] in state['radarr'].get('unmonitored_ids', []):
-                continue
-                
-            # If the file isn't monitored in Radarr already, skip it
-            if not item.get('monitored', True):
-                # Add to unmonitored list if not already there
-                if item['id'] not in state['radarr'].get('unmonitored_ids', []):
-                    state['radarr']['unmonitored_ids'].append(item['id'])
-                continue
-            
-            # Include media with changes or new additions since last scan
-            include_item = False
-            
-            # Check if media was added after the last scan
-            if 'added' in item:
-                added_date = date_parser.parse(item['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_item = True
-            
-            # Also include items with recent file changes
-            if not include_item and 'movieFile' in item and item['movieFile'] and 'dateAdded' in item['movieFile']:
-                file_date = date_parser.parse(item['movieFile']['dateAdded'])
-                if file_date.tzinfo is not None:
-                    file_date = file_date.replace(tzinfo=None)
-                if file_date > last_scan_date:
-                    include_item = True
-            
-            # Include items that haven't been processed before or have changes
-            if include_item or item['id'] not in state['radarr'].get('processed_ids', []):
-                new_media.append(item)
-        
-        logger.info(f"Found {len(new_media)} movies to process (new/updated/not unmonitored)")
-        return new_media
-        
-    else:  # sonarr
-        # Fetch all series
-        all_series = fetch_all_media(config)
-        
-        # Get episodes added since last scan date or not yet unmonitored
-        series_to_process = []
-        for series in all_series:
-            # Skip if series is completely unmonitored and in our tracking
-            if series['id'] in state['sonarr'].get('unmonitored_ids', []):
-                continue
-                
-            # Check if series was added recently
-            include_series = False
-            if 'added' in series:
-                added_date = date_parser.parse(series['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_series = True
-            
-            # Check for episodes that need processing
-            if not include_series:
-                # Get episodes for all seasons
-                needs_processing = False
-                all_episodes = []
-                
-                # First check each season
-                for season in series.get('seasons', []):
-                    season_number = season.get('seasonNumber')
-                    
-                    # Skip if season is already unmonitored in our tracking
-                    if series['id'] in state['sonarr'].get('unmonitored_seasons', {}) and \
-                       season_number in state['sonarr']['unmonitored_seasons'].get(series['id'], []):
-                        continue
-                        
-                    # If season is not monitored in Sonarr, track it but skip
-                    if not season.get('monitored', True):
-                        # Initialize season tracking if needed
-                        if 'unmonitored_seasons' not in state['sonarr']:
-                            state['sonarr']['unmonitored_seasons'] = {}
-                        if series['id'] not in state['sonarr']['unmonitored_seasons']:
-                            state['sonarr']['unmonitored_seasons'][series['id']] = []
-                            
-                        # Add to our tracking if not already there
-                        if season_number not in state['sonarr']['unmonitored_seasons'][series['id']]:
-                            state['sonarr']['unmonitored_seasons'][series['id']].append(season_number)
-                            
-                        continue
-                    
-                    # Get episodes for this season
-                    episodes = get_episodes(config, series['id'], season_number)
-                    if episodes:
-                        all_episodes.extend(episodes)
-                
-                # Now check individual episodes
-                for episode in all_episodes:
-                    # Skip episodes already marked as unmonitored
-                    if episode['id'] in state['sonarr'].get('unmonitored_episode_ids', []):
-                        continue
-                        
-                    # If already unmonitored in Sonarr, record it but skip
-                    if not episode.get('monitored', True):
-                        if episode['id'] not in state['sonarr'].get('unmonitored_episode_ids', []):
-                            state['sonarr']['unmonitored_episode_ids'].append(episode['id'])
-                        continue
-                    
-                    if not episode.get('hasFile', False) or not episode.get('episodeFileId'):
-                        continue
-                    
-                    # New episode file added
-                    if 'episodeFile' in episode and 'dateAdded' in episode['episodeFile']:
-                        file_date = date_parser.parse(episode['episodeFile']['dateAdded'])
-                        if file_date.tzinfo is not None:
-                            file_date = file_date.replace(tzinfo=None)
-                        if file_date > last_scan_date:
-                            needs_processing = True
-                            break
-                    
-                    # Episode hasn't been processed yet
-                    if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                        needs_processing = True
-                        break
-                
-                if needs_processing:
-                    include_series = True
-            
-            # Include new or unprocessed series
-            if include_series or series['id'] not in state['sonarr'].get('processed_ids', []):
-                series_to_process.append(series)
-        
-        logger.info(f"Found {len(series_to_process)} series to process (new/updated/not unmonitored)")
-        return series_to_process
-
-def get_file_details(config, media_id, file_id=None):
-    """Get file details for a specific movie or series/episode"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    if config['service'] == 'radarr':
-        url = f"{api_url}/moviefile?movieId={media_id}"
-    else:  # sonarr
-        if file_id:
-            # Get a specific episode file
-            url = f"{api_url}/episodefile/{file_id}"
-            try:
-                response = requests.get(url, headers=headers, timeout=30)
-                response.raise_for_status()
-                return [response.json()]  # Return as a list for consistent handling
-            except requests.exceptions.RequestException as e:
-                if config.get('debug'):
-                    logger.debug(f"Failed to get episode file {file_id}: {str(e)}")
-                return []
-        else:
-            # Get all episode files for a series
-            url = f"{api_url}/episodefile?seriesId={media_id}"
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get file details: {str(e)}")
-        return []
-
-def get_seasons_for_series(config, series_id):
-    """
-    Fetch all seasons for a series, including metadata on monitored status
-    and episode counts.
-    
-    Args:
-        config: Configuration dictionary with API details
-        series_id: ID of the series to fetch seasons for
-        
-    Returns:
-        list: List of seasons with metadata
-    """
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    try:
-        # Get the series first to access the seasons array
-        url = f"{api_url}/series/{series_id}"
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        series = response.json()
-        
-        if 'seasons' not in series:
-            logger.warning(f"No seasons array found for series ID {series_id}")
-            return []
-            
-        # Return the seasons array
-        return series['seasons']
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get seasons for series {series_id}: {str(e)}")
-        return []
-
-def get_episodes(config, series_id, season_number=None):
-    """Fetch episodes for a series, optionally filtered by season (Sonarr only)"""
-    if config['service'] != 'sonarr':
-        return []
-        
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    url = f"{api_url}/episode?seriesId={series_id}"
-    
-    # Add retry logic for more resilience
-    max_retries = 3
-    retry_delay = 2  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            episodes = response.json()
-            
-            # Filter by season if specified
-            if season_number is not None:
-                episodes = [ep for ep in episodes if ep.get('seasonNumber') == season_number]
-                
-            # Keep only episodes with files
-            episodes_with_files = [ep for ep in episodes if ep.get('hasFile', False)]
-            
-            if config.get('debug'):
-                logger.debug(f"Found {len(episodes_with_files)}/{len(episodes)} episodes with files for season {season_number}")
-                
-            return episodes_with_files
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                logger.warning(f"API request failed, retrying in {retry_delay}s: {str(e)}")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                logger.error(f"Failed to get episodes after {max_retries} attempts: {str(e)}")
-                return []
-
-def get_release_group(file_path, config):
-    """
-    Extract release group from file path using enhanced pattern matching.
-    
-    Works with a wide variety of naming conventions including:
-    - Standard: Movie.Title.2023.1080p.WEB-DL.DDP5.1.H.264-RELEASEGROUP
-    - Hyphenated: Movie Title (2023) [1080p] [WEB-DL] [DDP5.1] [H.264]-RELEASEGROUP
-    - Bracketed: Movie.Title.2023.1080p.BluRay.x264.[RELEASEGROUP]
-    - Multiple tags: Movie.Title.2023.1080p.[HDR10].[DV].[DDP5.1]-RELEASEGROUP
-    """
-    # Get just the filename without the path
-    filename = os.path.basename(file_path)
-    
-    # First, remove the file extension
-    basename = os.path.splitext(filename)[0]
-    
-    if config.get('debug'):
-        logger.debug(f"Analyzing filename for release group: {basename}")
-    
-    # For troubleshooting, extract and log the last portion of the filename
-    # This helps identify patterns we might be missing
-    last_segment = basename.split('-')[-1] if '-' in basename else ''
-    if last_segment and config.get('debug'):
-        logger.debug(f"Last segment after hyphen: {last_segment}")
-
-def save_state(state):
-    """Save the current state to file with enhanced reporting"""
-    try:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(state_file), exist_ok=True)
-        
-        # Create a backup of the current state file if it exists
-        if os.path.exists(state_file):
-            backup_file = f"{state_file}.bak"
-            shutil.copy2(state_file, backup_file)
-            
-        # Update the last scan timestamp
-        state['last_scan'] = datetime.now().isoformat()
-        
-        # Write the new state
-        with open(state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-            logger.info(f"Saved state file to {state_file}")
-            
-        # Log a summary of the current state
-        if logger.level <= logging.INFO:
-            summary = generate_state_summary(state)
-            for line in summary.split("\n"):
-                logger.info(line)
-                
-    except Exception as e:
-        logger.error(f"Error saving state file: {str(e)}")
-
-def fetch_all_media(config):
-    """Fetch all media items from Radarr or Sonarr"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    endpoint = "movie" if config['service'] == 'radarr' else "series"
-    url = f"{api_url}/{endpoint}"
-    
-    logger.info(f"Fetching all media items from {url}")
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        media_items = response.json()
-        
-        # Apply sample size limit if configured
-        if config.get('sample_size') and config['sample_size'] > 0:
-            original_count = len(media_items)
-            media_items = media_items[:config['sample_size']]
-            logger.info(f"Limiting from {original_count} to {len(media_items)} items for testing")
-            
-        return media_items
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed: {str(e)}")
-        return []
-
-def fetch_new_media(config, state, last_scan=None):
-    """Fetch only new or updated media items since the last scan,
-    skipping only items that were actually unmonitored"""
-    
-    if not last_scan:
-        return fetch_all_media(config)
-    
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    # Convert ISO timestamp to date object for comparison
-    last_scan_date = date_parser.parse(last_scan)
-    # Ensure the datetime is timezone-naive for consistent comparison
-    if last_scan_date.tzinfo is not None:
-        last_scan_date = last_scan_date.replace(tzinfo=None)
-    
-    if config['service'] == 'radarr':
-        # Fetch all movies
-        all_media = fetch_all_media(config)
-        
-        # Filter to only include new or updated items, or items not yet unmonitored
-        new_media = []
-        for item in all_media:
-            # Skip only if previously unmonitored - THIS IS THE KEY CHANGE
-            if item['id'] in state['radarr'].get('unmonitored_ids', []):
-                continue
-                
-            # If the file isn't monitored in Radarr already, skip it
-            if not item.get('monitored', True):
-                # Add to unmonitored list if not already there
-                if item['id'] not in state['radarr'].get('unmonitored_ids', []):
-                    state['radarr']['unmonitored_ids'].append(item['id'])
-                continue
-            
-            # Include media with changes or new additions since last scan
-            include_item = False
-            
-            # Check if media was added after the last scan
-            if 'added' in item:
-                added_date = date_parser.parse(item['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_item = True
-            
-            # Also include items with recent file changes
-            if not include_item and 'movieFile' in item and item['movieFile'] and 'dateAdded' in item['movieFile']:
-                file_date = date_parser.parse(item['movieFile']['dateAdded'])
-                if file_date.tzinfo is not None:
-                    file_date = file_date.replace(tzinfo=None)
-                if file_date > last_scan_date:
-                    include_item = True
-            
-            # Include items that haven't been processed before or have changes
-            if include_item or item['id'] not in state['radarr'].get('processed_ids', []):
-                new_media.append(item)
-        
-        logger.info(f"Found {len(new_media)} movies to process (new/updated/not unmonitored)")
-        return new_media
-        
-    else:  # sonarr
-        # Fetch all series
-        all_series = fetch_all_media(config)
-        
-        # Get episodes added since last scan date or not yet unmonitored
-        series_to_process = []
-        for series in all_series:
-            # Skip if series is completely unmonitored and in our tracking
-            if series['id'] in state['sonarr'].get('unmonitored_ids', []):
-                continue
-                
-            # Check if series was added recently
-            include_series = False
-            if 'added' in series:
-                added_date = date_parser.parse(series['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_series = True
-            
-            # Check for episodes that need processing
-            if not include_series:
-                # Get episodes for all seasons
-                needs_processing = False
-                all_episodes = []
-                
-                # First check each season
-                for season in series.get('seasons', []):
-                    season_number = season.get('seasonNumber')
-                    
-                    # Skip if season is already unmonitored in our tracking
-                    if series['id'] in state['sonarr'].get('unmonitored_seasons', {}) and \
-                       season_number in state['sonarr']['unmonitored_seasons'].get(series['id'], []):
-                        continue
-                        
-                    # If season is not monitored in Sonarr, track it but skip
-                    if not season.get('monitored', True):
-                        # Initialize season tracking if needed
-                        if 'unmonitored_seasons' not in state['sonarr']:
-                            state['sonarr']['unmonitored_seasons'] = {}
-                        if series['id'] not in state['sonarr']['unmonitored_seasons']:
-                            state['sonarr']['unmonitored_seasons'][series['id']] = []
-                            
-                        # Add to our tracking if not already there
-                        if season_number not in state['sonarr']['unmonitored_seasons'][series['id']]:
-                            state['sonarr']['unmonitored_seasons'][series['id']].append(season_number)
-                            
-                        continue
-                    
-                    # Get episodes for this season
-                    episodes = get_episodes(config, series['id'], season_number)
-                    if episodes:
-                        all_episodes.extend(episodes)
-                
-                # Now check individual episodes
-                for episode in all_episodes:
-                    # Skip episodes already marked as unmonitored
-                    if episode['id'] in state['sonarr'].get('unmonitored_episode_ids', []):
-                        continue
-                        
-                    # If already unmonitored in Sonarr, record it but skip
-                    if not episode.get('monitored', True):
-                        if episode['id'] not in state['sonarr'].get('unmonitored_episode_ids', []):
-                            state['sonarr']['unmonitored_episode_ids'].append(episode['id'])
-                        continue
-                    
-                    if not episode.get('hasFile', False) or not episode.get('episodeFileId'):
-                        continue
-                    
-                    # New episode file added
-                    if 'episodeFile' in episode and 'dateAdded' in episode['episodeFile']:
-                        file_date = date_parser.parse(episode['episodeFile']['dateAdded'])
-                        if file_date.tzinfo is not None:
-                            file_date = file_date.replace(tzinfo=None)
-                        if file_date > last_scan_date:
-                            needs_processing = True
-                            break
-                    
-                    # Episode hasn't been processed yet
-                    if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                        needs_processing = True
-                        break
-                
-                if needs_processing:
-                    include_series = True
-            
-            # Include new or unprocessed series
-            if include_series or series['id'] not in state['sonarr'].get('processed_ids', []):
-                series_to_process.append(series)
-        
-        logger.info(f"Found {len(series_to_process)} series to process (new/updated/not unmonitored)")
-        return series_to_process
-
-def get_file_details(config, media_id, file_id=None):
-    """Get file details for a specific movie or series/episode"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    if config['service'] == 'radarr':
-        url = f"{api_url}/moviefile?movieId={media_id}"
-    else:  # sonarr
-        if file_id:
-            # Get a specific episode file
-            url = f"{api_url}/episodefile/{file_id}"
-            try:
-                response = requests.get(url, headers=headers, timeout=30)
-                response.raise_for_status()
-                return [response.json()]  # Return as a list for consistent handling
-            except requests.exceptions.RequestException as e:
-                if config.get('debug'):
-                    logger.debug(f"Failed to get episode file {file_id}: {str(e)}")
-                return []
-        else:
-            # Get all episode files for a series
-            url = f"{api_url}/episodefile?seriesId={media_id}"
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get file details: {str(e)}")
-        return []
-
-def get_seasons_for_series(config, series_id):
-    """
-    Fetch all seasons for a series, including metadata on monitored status
-    and episode counts.
-    
-    Args:
-        config: Configuration dictionary with API details
-        series_id: ID of the series to fetch seasons for
-        
-    Returns:
-        list: List of seasons with metadata
-    """
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    try:
-        # Get the series first to access the seasons array
-        url = f"{api_url}/series/{series_id}"
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        series = response.json()
-        
-        if 'seasons' not in series:
-            logger.warning(f"No seasons array found for series ID {series_id}")
-            return []
-            
-        # Return the seasons array
-        return series['seasons']
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get seasons for series {series_id}: {str(e)}")
-        return []
-
-def get_episodes(config, series_id, season_number=None):
-    """Fetch episodes for a series, optionally filtered by season (Sonarr only)"""
-    if config['service'] != 'sonarr':
-        return []
-        
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    url = f"{api_url}/episode?seriesId={series_id}"
-    
-    # Add retry logic for more resilience
-    max_retries = 3
-    retry_delay = 2  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            episodes = response.json()
-            
-            # Filter by season if specified
-            if season_number is not None:
-                episodes = [ep for ep in episodes if ep.get('seasonNumber') == season_number]
-                
-            # Keep only episodes with files
-            episodes_with_files = [ep for ep in episodes if ep.get('hasFile', False)]
-            
-            if config.get('debug'):
-                logger.debug(f"Found {len(episodes_with_files)}/{len(episodes)} episodes with files for season {season_number}")
-                
-            return episodes_with_files
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                logger.warning(f"API request failed, retrying in {retry_delay}s: {str(e)}")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                logger.error(f"Failed to get episodes after {max_retries} attempts: {str(e)}")
-                return []
-
-def get_release_group(file_path, config):
-    """
-    Extract release group from file path using enhanced pattern matching.
-    
-    Works with a wide variety of naming conventions including:
-    - Standard: Movie.Title.2023.1080p.WEB-DL.DDP5.1.H.264-RELEASEGROUP
-    - Hyphenated: Movie Title (2023) [1080p] [WEB-DL] [DDP5.1] [H.264]-RELEASEGROUP
-    - Bracketed: Movie.Title.2023.1080p.BluRay.x264.[RELEASEGROUP]
-    - Multiple tags: Movie.Title.2023.1080p.[HDR10].[DV].[DDP5.1]-RELEASEGROUP
-    """
-    # Get just the filename without the path
-    filename = os.path.basename(file_path)
-    
-    # First, remove the file extension
-    basename = os.path.splitext(filename)[0]
-    
-    if config.get('debug'):
-        logger.debug(f"Analyzing filename for release group: {basename}")
-    
-    # For troubleshooting, extract and log the last portion of the filename
-    # This helps identify patterns we might be missing
-    last_segment = basename.split('-')[-1] if '-' in basename else ''
-    if last_segment and config.get('debug'):
-        logger.debug(f"Last segment after hyphen: {last_segment}")
-    
-def save_state(state):
-    """Save the current state to file with enhanced reporting"""
-    try:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(state_file), exist_ok=True)
-        
-        # Create a backup of the current state file if it exists
-        if os.path.exists(state_file):
-            backup_file = f"{state_file}.bak"
-            shutil.copy2(state_file, backup_file)
-            
-        # Update the last scan timestamp
-        state['last_scan'] = datetime.now().isoformat()
-        
-        # Write the new state
-        with open(state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-            logger.info(f"Saved state file to {state_file}")
-            
-        # Log a summary of the current state
-        if logger.level <= logging.INFO:
-            summary = generate_state_summary(state)
-            for line in summary.split("\n"):
-                logger.info(line)
-                
-    except Exception as e:
-        logger.error(f"Error saving state file: {str(e)}")
-
-def fetch_all_media(config):
-    """Fetch all media items from Radarr or Sonarr"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    endpoint = "movie" if config['service'] == 'radarr' else "series"
-    url = f"{api_url}/{endpoint}"
-    
-    logger.info(f"Fetching all media items from {url}")
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        media_items = response.json()
-        
-        # Apply sample size limit if configured
-        if config.get('sample_size') and config['sample_size'] > 0:
-            original_count = len(media_items)
-            media_items = media_items[:config['sample_size']]
-            logger.info(f"Limiting from {original_count} to {len(media_items)} items for testing")
-            
-        return media_items
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed: {str(e)}")
-        return []
-
-def fetch_new_media(config, state, last_scan=None):
-    """Fetch only new or updated media items since the last scan,
-    skipping only items that were actually unmonitored"""
-    
-    if not last_scan:
-        return fetch_all_media(config)
-    
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    # Convert ISO timestamp to date object for comparison
-    last_scan_date = date_parser.parse(last_scan)
-    # Ensure the datetime is timezone-naive for consistent comparison
-    if last_scan_date.tzinfo is not None:
-        last_scan_date = last_scan_date.replace(tzinfo=None)
-    
-    if config['service'] == 'radarr':
-        # Fetch all movies
-        all_media = fetch_all_media(config)
-        
-        # Filter to only include new or updated items, or items not yet unmonitored
-        new_media = []
-        for item in all_media:
-            # Skip only if previously unmonitored - THIS IS THE KEY CHANGE
-            if item['id'] in state['radarr'].get('unmonitored_ids', []):
-                continue
-                
-            # If the file isn't monitored in Radarr already, skip it
-            if not item.get('monitored', True):
-                # Add to unmonitored list if not already there
-                if item['id'] not in state['radarr'].get('unmonitored_ids', []):
-                    state['radarr']['unmonitored_ids'].append(item['id'])
-                continue
-            
-            # Include media with changes or new additions since last scan
-            include_item = False
-            
-            # Check if media was added after the last scan
-            if 'added' in item:
-                added_date = date_parser.parse(item['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_item = True
-            
-            # Also include items with recent file changes
-            if not include_item and 'movieFile' in item and item['movieFile'] and 'dateAdded' in item['movieFile']:
-                file_date = date_parser.parse(item['movieFile']['dateAdded'])
-                if file_date.tzinfo is not None:
-                    file_date = file_date.replace(tzinfo=None)
-                if file_date > last_scan_date:
-                    include_item = True
-            
-            # Include items that haven't been processed before or have changes
-            if include_item or item['id'] not in state['radarr'].get('processed_ids', []):
-                new_media.append(item)
-        
-        logger.info(f"Found {len(new_media)} movies to process (new/updated/not unmonitored)")
-        return new_media
-        
-    else:  # sonarr
-        # Fetch all series
-        all_series = fetch_all_media(config)
-        
-        # Get episodes added since last scan date or not yet unmonitored
-        series_to_process = []
-        for series in all_series:
-            # Skip if series is completely unmonitored and in our tracking
-            if series['id'] in state['sonarr'].get('unmonitored_ids', []):
-                continue
-                
-            # Check if series was added recently
-            include_series = False
-            if 'added' in series:
-                added_date = date_parser.parse(series['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_series = True
-            
-            # Check for episodes that need processing
-            if not include_series:
-                # Get episodes for all seasons
-                needs_processing = False
-                all_episodes = []
-                
-                # First check each season
-                for season in series.get('seasons', []):
-                    season_number = season.get('seasonNumber')
-                    
-                    # Skip if season is already unmonitored in our tracking
-                    if series['id'] in state['sonarr'].get('unmonitored_seasons', {}) and \
-                       season_number in state['sonarr']['unmonitored_seasons'].get(series['id'], []):
-                        continue
-                        
-                    # If season is not monitored in Sonarr, track it but skip
-                    if not season.get('monitored', True):
-                        # Initialize season tracking if needed
-                        if 'unmonitored_seasons' not in state['sonarr']:
-                            state['sonarr']['unmonitored_seasons'] = {}
-                        if series['id'] not in state['sonarr']['unmonitored_seasons']:
-                            state['sonarr']['unmonitored_seasons'][series['id']] = []
-                            
-                        # Add to our tracking if not already there
-                        if season_number not in state['sonarr']['unmonitored_seasons'][series['id']]:
-                            state['sonarr']['unmonitored_seasons'][series['id']].append(season_number)
-                            
-                        continue
-                    
-                    # Get episodes for this season
-                    episodes = get_episodes(config, series['id'], season_number)
-                    if episodes:
-                        all_episodes.extend(episodes)
-                
-                # Now check individual episodes
-                for episode in all_episodes:
-                    # Skip episodes already marked as unmonitored
-                    if episode['id'] in state['sonarr'].get('unmonitored_episode_ids', []):
-                        continue
-                        
-                    # If already unmonitored in Sonarr, record it but skip
-                    if not episode.get('monitored', True):
-                        if episode['id'] not in state['sonarr'].get('unmonitored_episode_ids', []):
-                            state['sonarr']['unmonitored_episode_ids'].append(episode['id'])
-                        continue
-                    
-                    if not episode.get('hasFile', False) or not episode.get('episodeFileId'):
-                        continue
-                    
-                    # New episode file added
-                    if 'episodeFile' in episode and 'dateAdded' in episode['episodeFile']:
-                        file_date = date_parser.parse(episode['episodeFile']['dateAdded'])
-                        if file_date.tzinfo is not None:
-                            file_date = file_date.replace(tzinfo=None)
-                        if file_date > last_scan_date:
-                            needs_processing = True
-                            break
-                    
-                    # Episode hasn't been processed yet
-                    if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                        needs_processing = True
-                        break
-                
-                if needs_processing:
-                    include_series = True
-            
-            # Include new or unprocessed series
-            if include_series or series['id'] not in state['sonarr'].get('processed_ids', []):
-                series_to_process.append(series)
-        
-        logger.info(f"Found {len(series_to_process)} series to process (new/updated/not unmonitored)")
-        return series_to_process
-
-def get_file_details(config, media_id, file_id=None):
-    """Get file details for a specific movie or series/episode"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    if config['service'] == 'radarr':
-        url = f"{api_url}/moviefile?movieId={media_id}"
-    else:  # sonarr
-        if file_id:
-            # Get a specific episode file
-            url = f"{api_url}/episodefile/{file_id}"
-            try:
-                response = requests.get(url, headers=headers, timeout=30)
-                response.raise_for_status()
-                return [response.json()]  # Return as a list for consistent handling
-            except requests.exceptions.RequestException as e:
-                if config.get('debug'):
-                    logger.debug(f"Failed to get episode file {file_id}: {str(e)}")
-                return []
-        else:
-            # Get all episode files for a series
-            url = f"{api_url}/episodefile?seriesId={media_id}"
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get file details: {str(e)}")
-        return []
-
-def get_seasons_for_series(config, series_id):
-    """
-    Fetch all seasons for a series, including metadata on monitored status
-    and episode counts.
-    
-    Args:
-        config: Configuration dictionary with API details
-        series_id: ID of the series to fetch seasons for
-        
-    Returns:
-        list: List of seasons with metadata
-    """
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    try:
-        # Get the series first to access the seasons array
-        url = f"{api_url}/series/{series_id}"
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        series = response.json()
-        
-        if 'seasons' not in series:
-            logger.warning(f"No seasons array found for series ID {series_id}")
-            return []
-            
-        # Return the seasons array
-        return series['seasons']
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get seasons for series {series_id}: {str(e)}")
-        return []
-
-def get_episodes(config, series_id, season_number=None):
-    """Fetch episodes for a series, optionally filtered by season (Sonarr only)"""
-    if config['service'] != 'sonarr':
-        return []
-        
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    url = f"{api_url}/episode?seriesId={series_id}"
-    
-    # Add retry logic for more resilience
-    max_retries = 3
-    retry_delay = 2  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            episodes = response.json()
-            
-            # Filter by season if specified
-            if season_number is not None:
-                episodes = [ep for ep in episodes if ep.get('seasonNumber') == season_number]
-                
-            # Keep only episodes with files
-            episodes_with_files = [ep for ep in episodes if ep.get('hasFile', False)]
-            
-            if config.get('debug'):
-                logger.debug(f"Found {len(episodes_with_files)}/{len(episodes)} episodes with files for season {season_number}")
-                
-            return episodes_with_files
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                logger.warning(f"API request failed, retrying in {retry_delay}s: {str(e)}")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                logger.error(f"Failed to get episodes after {max_retries} attempts: {str(e)}")
-                return []
-
-def get_release_group(file_path, config):
-    """
-    Extract release group from file path using enhanced pattern matching.
-    
-    Works with a wide variety of naming conventions including:
-    - Standard: Movie.Title.2023.1080p.WEB-DL.DDP5.1.H.264-RELEASEGROUP
-    - Hyphenated: Movie Title (2023) [1080p] [WEB-DL] [DDP5.1] [H.264]-RELEASEGROUP
-    - Bracketed: Movie.Title.2023.1080p.BluRay.x264.[RELEASEGROUP]
-    - Multiple tags: Movie.Title.2023.1080p.[HDR10].[DV].[DDP5.1]-RELEASEGROUP
-    """
-    # Get just the filename without the path
-    filename = os.path.basename(file_path)
-    
-    # First, remove the file extension
-    basename = os.path.splitext(filename)[0]
-    
-    if config.get('debug'):
-        logger.debug(f"Analyzing filename for release group: {basename}")
-    
-    # For troubleshooting, extract and log the last portion of the filename
-    # This helps identify patterns we might be missing
-    last_segment = basename.split('-')[-1] if '-' in basename else ''
-    if last_segment and config.get('debug'):
-        logger.debug(f"Last segment after hyphen: {last_segment}")
-
-def save_state(state):
-    """Save the current state to file with enhanced reporting"""
-    try:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(state_file), exist_ok=True)
-        
-        # Create a backup of the current state file if it exists
-        if os.path.exists(state_file):
-            backup_file = f"{state_file}.bak"
-            shutil.copy2(state_file, backup_file)
-            
-        # Update the last scan timestamp
-        state['last_scan'] = datetime.now().isoformat()
-        
-        # Write the new state
-        with open(state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-            logger.info(f"Saved state file to {state_file}")
-            
-        # Log a summary of the current state
-        if logger.level <= logging.INFO:
-            summary = generate_state_summary(state)
-            for line in summary.split("\n"):
-                logger.info(line)
-                
-    except Exception as e:
-        logger.error(f"Error saving state file: {str(e)}")
-
-def fetch_all_media(config):
-    """Fetch all media items from Radarr or Sonarr"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    endpoint = "movie" if config['service'] == 'radarr' else "series"
-    url = f"{api_url}/{endpoint}"
-    
-    logger.info(f"Fetching all media items from {url}")
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        media_items = response.json()
-        
-        # Apply sample size limit if configured
-        if config.get('sample_size') and config['sample_size'] > 0:
-            original_count = len(media_items)
-            media_items = media_items[:config['sample_size']]
-            logger.info(f"Limiting from {original_count} to {len(media_items)} items for testing")
-            
-        return media_items
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed: {str(e)}")
-        return []
-
-def fetch_new_media(config, state, last_scan=None):
-    """Fetch only new or updated media items since the last scan,
-    skipping only items that were actually unmonitored"""
-    
-    if not last_scan:
-        return fetch_all_media(config)
-    
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    # Convert ISO timestamp to date object for comparison
-    last_scan_date = date_parser.parse(last_scan)
-    # Ensure the datetime is timezone-naive for consistent comparison
-    if last_scan_date.tzinfo is not None:
-        last_scan_date = last_scan_date.replace(tzinfo=None)
-    
-    if config['service'] == 'radarr':
-        # Fetch all movies
-        all_media = fetch_all_media(config)
-        
-        # Filter to only include new or updated items, or items not yet unmonitored
-        new_media = []
-        for item in all_media:
-            # Skip only if previously unmonitored - THIS IS THE KEY CHANGE
-            if item['id'] in state['radarr'].get('unmonitored_ids', []):
-                continue
-                
-            # If the file isn't monitored in Radarr already, skip it
-            if not item.get('monitored', True):
-                # Add to unmonitored list if not already there
-                if item['id'] not in state['radarr'].get('unmonitored_ids', []):
-                    state['radarr']['unmonitored_ids'].append(item['id'])
-                continue
-            
-            # Include media with changes or new additions since last scan
-            include_item = False
-            
-            # Check if media was added after the last scan
-            if 'added' in item:
-                added_date = date_parser.parse(item['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_item = True
-            
-            # Also include items with recent file changes
-            if not include_item and 'movieFile' in item and item['movieFile'] and 'dateAdded' in item['movieFile']:
-                file_date = date_parser.parse(item['movieFile']['dateAdded'])
-                if file_date.tzinfo is not None:
-                    file_date = file_date.replace(tzinfo=None)
-                if file_date > last_scan_date:
-                    include_item = True
-            
-            # Include items that haven't been processed before or have changes
-            if include_item or item['id'] not in state['radarr'].get('processed_ids', []):
-                new_media.append(item)
-        
-        logger.info(f"Found {len(new_media)} movies to process (new/updated/not unmonitored)")
-        return new_media
-        
-    else:  # sonarr
-        # Fetch all series
-        all_series = fetch_all_media(config)
-        
-        # Get episodes added since last scan date or not yet unmonitored
-        series_to_process = []
-        for series in all_series:
-            # Skip if series is completely unmonitored and in our tracking
-            if series['id'] in state['sonarr'].get('unmonitored_ids', []):
-                continue
-                
-            # Check if series was added recently
-            include_series = False
-            if 'added' in series:
-                added_date = date_parser.parse(series['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
-                if added_date > last_scan_date:
-                    include_series = True
-            
-            # Check for episodes that need processing
-            if not include_series:
-                # Get episodes for all seasons
-                needs_processing = False
-                all_episodes = []
-                
-                # First check each season
-                for season in series.get('seasons', []):
-                    season_number = season.get('seasonNumber')
-                    
-                    # Skip if season is already unmonitored in our tracking
-                    if series['id'] in state['sonarr'].get('unmonitored_seasons', {}) and \
-                       season_number in state['sonarr']['unmonitored_seasons'].get(series['id'], []):
-                        continue
-                        
-                    # If season is not monitored in Sonarr, track it but skip
-                    if not season.get('monitored', True):
-                        # Initialize season tracking if needed
-                        if 'unmonitored_seasons' not in state['sonarr']:
-                            state['sonarr']['unmonitored_seasons'] = {}
-                        if series['id'] not in state['sonarr']['unmonitored_seasons']:
-                            state['sonarr']['unmonitored_seasons'][series['id']] = []
-                            
-                        # Add to our tracking if not already there
-                        if season_number not in state['sonarr']['unmonitored_seasons'][series['id']]:
-                            state['sonarr']['unmonitored_seasons'][series['id']].append(season_number)
-                            
-                        continue
-                    
-                    # Get episodes for this season
-                    episodes = get_episodes(config, series['id'], season_number)
-                    if episodes:
-                        all_episodes.extend(episodes)
-                
-                # Now check individual episodes
-                for episode in all_episodes:
-                    # Skip episodes already marked as unmonitored
-                    if episode['id'] in state['sonarr'].get('unmonitored_episode_ids', []):
-                        continue
-                        
-                    # If already unmonitored in Sonarr, record it but skip
-                    if not episode.get('monitored', True):
-                        if episode['id'] not in state['sonarr'].get('unmonitored_episode_ids', []):
-                            state['sonarr']['unmonitored_episode_ids'].append(episode['id'])
-                        continue
-                    
-                    if not episode.get('hasFile', False) or not episode.get('episodeFileId'):
-                        continue
-                    
-                    # New episode file added
-                    if 'episodeFile' in episode and 'dateAdded' in episode['episodeFile']:
-                        file_date = date_parser.parse(episode['episodeFile']['dateAdded'])
-                        if file_date.tzinfo is not None:
-                            file_date = file_date.replace(tzinfo=None)
-                        if file_date > last_scan_date:
-                            needs_processing = True
-                            break
-                    
-                    # Episode hasn't been processed yet
-                    if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                        needs_processing = True
-                        break
-                
-                if needs_processing:
-                    include_series = True
-            
-            # Include new or unprocessed series
-            if include_series or series['id'] not in state['sonarr'].get('processed_ids', []):
-                series_to_process.append(series)
-        
-        logger.info(f"Found {len(series_to_process)} series to process (new/updated/not unmonitored)")
-        return series_to_process
-
-def get_file_details(config, media_id, file_id=None):
-    """Get file details for a specific movie or series/episode"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    if config['service'] == 'radarr':
-        url = f"{api_url}/moviefile?movieId={media_id}"
-    else:  # sonarr
-        if file_id:
-            # Get a specific episode file
-            url = f"{api_url}/episodefile/{file_id}"
-            try:
-                response = requests.get(url, headers=headers, timeout=30)
-                response.raise_for_status()
-                return [response.json()]  # Return as a list for consistent handling
-            except requests.exceptions.RequestException as e:
-                if config.get('debug'):
-                    logger.debug(f"Failed to get episode file {file_id}: {str(e)}")
-                return []
-        else:
-            # Get all episode files for a series
-            url = f"{api_url}/episodefile?seriesId={media_id}"
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get file details: {str(e)}")
-        return []
-
-def get_seasons_for_series(config, series_id):
-    """
-    Fetch all seasons for a series, including metadata on monitored status
-    and episode counts.
-    
-    Args:
-        config: Configuration dictionary with API details
-        series_id: ID of the series to fetch seasons for
-        
-    Returns:
-        list: List of seasons with metadata
-    """
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    try:
-        # Get the series first to access the seasons array
-        url = f"{api_url}/series/{series_id}"
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        series = response.json()
-        
-        if 'seasons' not in series:
-            logger.warning(f"No seasons array found for series ID {series_id}")
-            return []
-            
-        # Return the seasons array
-        return series['seasons']
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get seasons for series {series_id}: {str(e)}")
-        return []
-
-def get_episodes(config, series_id, season_number=None):
-    """Fetch episodes for a series, optionally filtered by season (Sonarr only)"""
-    if config['service'] != 'sonarr':
-        return []
-        
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    url = f"{api_url}/episode?seriesId={series_id}"
-    
-    # Add retry logic for more resilience
-    max_retries = 3
-    retry_delay = 2  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            episodes = response.json()
-            
-            # Filter by season if specified
-            if season_number is not None:
-                episodes = [ep for ep in episodes if ep.get('seasonNumber') == season_number]
-                
-            # Keep only episodes with files
-            episodes_with_files = [ep for ep in episodes if ep.get('hasFile', False)]
-            
-            if config.get('debug'):
-                logger.debug(f"Found {len(episodes_with_files)}/{len(episodes)} episodes with files for season {season_number}")
-                
-            return episodes_with_files
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                logger.warning(f"API request failed, retrying in {retry_delay}s: {str(e)}")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                logger.error(f"Failed to get episodes after {max_retries} attempts: {str(e)}")
-                return []
-
-def get_release_group(file_path, config):
-    """
-    Extract release group from file path using enhanced pattern matching.
-    
-    Works with a wide variety of naming conventions including:
-    - Standard: Movie.Title.2023.1080p.WEB-DL.DDP5.1.H.264-RELEASEGROUP
-    - Hyphenated: Movie Title (2023) [1080p] [WEB-DL] [DDP5.1] [H.264]-RELEASEGROUP
-    - Bracketed: Movie.Title.2023.1080p.BluRay.x264.[RELEASEGROUP]
-    - Multiple tags: Movie.Title.2023.1080p.[HDR10].[DV].[DDP5.1]-RELEASEGROUP
-    """
-    # Get just the filename without the path
-    filename = os.path.basename(file_path)
-    
-    # First, remove the file extension
-    basename = os.path.splitext(filename)[0]
-    
-    if config.get('debug'):
-        logger.debug(f"Analyzing filename for release group: {basename}")
-    
-    # For troubleshooting, extract and log the last portion of the filename
-    # This helps identify patterns we might be missing
-    last_segment = basename.split('-')[-1] if '-' in basename else ''
-    if last_segment and config.get('debug'):
-        logger.debug(f"Last segment after hyphen: {last_segment}")
-
-def save_state(state):
-    """Save the current state to file with enhanced reporting"""
-    try:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(state_file), exist_ok=True)
-        
-        # Create a backup of the current state file if it exists
-        if os.path.exists(state_file):
-            backup_file = f"{state_file}.bak"
-            shutil.copy2(state_file, backup_file)
-            
-        # Update the last scan timestamp
-        state['last_scan'] = datetime.now().isoformat()
-        
-        # Write the new state
-        with open(state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-            logger.info(f"Saved state file to {state_file}")
-            
-        # Log a summary of the current state
-        if logger.level <= logging.INFO:
-            summary = generate_state_summary(state)
-            for line in summary.split("\n"):
-                logger.info(line)
-                
-    except Exception as e:
-        logger.error(f"Error saving state file: {str(e)}")
-
-def fetch_all_media(config):
-    """Fetch all media items from Radarr or Sonarr"""
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
-    endpoint = "movie" if config['service'] == 'radarr' else "series"
-    url = f"{api_url}/{endpoint}"
-    
-    logger.info(f"Fetching all media items from {url}")
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        media_items = response.json()
-        
-        # Apply sample size limit if configured
-        if config.get('sample_size') and config['sample_size'] > 0:
-            original_count = len(media_items)
-            media_items = media_items[:config['sample_size']]
-            logger.info(f"Limiting from {original_count} to {len(media_items)} items for testing")
-            
-        return media_items
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed: {str(e)}")
-        return []
-
-def fetch_new_media(config, state, last_scan=None):
-    """Fetch only new or updated media items since the last scan,
-    skipping only items that were actually unmonitored"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = date_parser.parse(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.replace(tzinfo=None)
+    return parsed
+
+def fetch_new_media(config, state, last_scan=None):
+    """Fetch only new or updated media items since the last scan,
+    skipping only items that were actually unmonitored"""
     
     if not last_scan:
-        return fetch_all_media(config)
-    
-    api_url = get_api_url(config)
-    headers = get_headers(config)
+        return fetch_all_media(config)
     
-    # Convert ISO timestamp to date object for comparison
-    last_scan_date = date_parser.parse(last_scan)
-    # Ensure the datetime is timezone-naive for consistent comparison
-    if last_scan_date.tzinfo is not None:
-        last_scan_date = last_scan_date.replace(tzinfo=None)
+    # Convert ISO timestamp to a timezone-naive date for consistent comparison
+    last_scan_date = parse_date(last_scan)
     
     if config['service'] == 'radarr':
         # Fetch all movies
         all_media = fetch_all_media(config)
         
+        # Bind the state sets once for the loop
+        unmonitored_ids = state['radarr']['unmonitored_ids']
+        processed_ids = state['radarr']['processed_ids']
+        
         # Filter to only include new or updated items, or items not yet unmonitored
         new_media = []
         for item in all_media:
             # Skip only if previously unmonitored - THIS IS THE KEY CHANGE
-            if item['id'] in state['radarr'].get('unmonitored_ids', []):
+            if item['id'] in unmonitored_ids:
                 continue
                 
             # If the file isn't monitored in Radarr already, skip it
             if not item.get('monitored', True):
                 # Add to unmonitored list if not already there
-                if item['id'] not in state['radarr'].get('unmonitored_ids', []):
-                    state['radarr']['unmonitored_ids'].append(item['id'])
+                unmonitored_ids.add(item['id'])
                 continue
             
             # Include media with changes or new additions since last scan
@@ -3461,124 +863,161 @@ def fetch_new_media(config, state, last_scan=None):
             
             # Check if media was added after the last scan
             if 'added' in item:
-                added_date = date_parser.parse(item['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
+                added_date = parse_date(item['added'])
                 if added_date > last_scan_date:
                     include_item = True
             
             # Also include items with recent file changes
             if not include_item and 'movieFile' in item and item['movieFile'] and 'dateAdded' in item['movieFile']:
-                file_date = date_parser.parse(item['movieFile']['dateAdded'])
-                if file_date.tzinfo is not None:
-                    file_date = file_date.replace(tzinfo=None)
+                file_date = parse_date(item['movieFile']['dateAdded'])
                 if file_date > last_scan_date:
                     include_item = True
             
             # Include items that haven't been processed before or have changes
-            if include_item or item['id'] not in state['radarr'].get('processed_ids', []):
+            if include_item or item['id'] not in processed_ids:
                 new_media.append(item)
         
         logger.info(f"Found {len(new_media)} movies to process (new/updated/not unmonitored)")
         return new_media
         
     else:  # sonarr
+        # Episodes left over from the previous scan (e.g. a series that failed
+        # before its episodes were used) must not stand in for a fresh fetch
+        _episode_cache.clear()
+        
         # Fetch all series
         all_series = fetch_all_media(config)
         
-        # Get episodes added since last scan date or not yet unmonitored
-        series_to_process = []
+        # First pass: decide which series are included by date alone and
+        # which need their episodes inspected
+        sonarr_state = state['sonarr']
+        unmonitored_series_ids = sonarr_state['unmonitored_ids']
+        processed_series_ids = sonarr_state['processed_ids']
+        unmonitored_episode_ids = sonarr_state['unmonitored_episode_ids']
+        processed_episode_ids = sonarr_state['processed_episode_ids']
+        unmonitored_seasons = sonarr_state.setdefault('unmonitored_seasons', {})
+        series_stats = sonarr_state.setdefault('series_stats', {})
+        candidates = []
+        included = set()
         for series in all_series:
             # Skip if series is completely unmonitored and in our tracking
-            if series['id'] in state['sonarr'].get('unmonitored_ids', []):
+            if series['id'] in unmonitored_series_ids:
                 continue
                 
             # Check if series was added recently
-            include_series = False
             if 'added' in series:
-                added_date = date_parser.parse(series['added'])
-                if added_date.tzinfo is not None:
-                    added_date = added_date.replace(tzinfo=None)
+                added_date = parse_date(series['added'])
                 if added_date > last_scan_date:
-                    include_series = True
+                    included.add(series['id'])
+                    continue
+            
+            # A series that was never processed is included anyway, and one whose
+            # files are unchanged since it was last checked has nothing new;
+            # neither needs its episodes fetched
+            if series['id'] not in processed_series_ids:
+                continue
+            stats = series_file_stats(series)
+            if stats is not None and stats == series_stats.get(series['id']):
+                continue
+            
+            candidates.append(series)
+        
+        # Prefetch the episodes of every candidate series concurrently
+        # instead of one blocking request after another
+        episodes_by_series = {}
+        max_workers = config.get('concurrent', 1)
+        if max_workers > 1 and len(candidates) > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, initializer=set_log_service,
+                                                       initargs=(get_log_service(),)) as executor:
+                fetched = executor.map(lambda series: get_episodes(config, series['id']), candidates)
+                for series, episodes in zip(candidates, fetched):
+                    episodes_by_series[series['id']] = episodes
+        else:
+            for series in candidates:
+                episodes_by_series[series['id']] = get_episodes(config, series['id'])
+        
+        # Second pass: check episodes for anything that needs processing
+        for series in candidates:
+            # If the episodes could not be fetched, leave the series (and its
+            # file statistics) untouched so it is checked again next scan
+            if episodes_by_series[series['id']] is None:
+                continue
+            
+            episodes_by_season = {}
+            for episode in episodes_by_series[series['id']]:
+                episodes_by_season.setdefault(episode.get('seasonNumber'), []).append(episode)
             
-            # Check for episodes that need processing
-            if not include_series:
-                # Get episodes for all seasons
-                needs_processing = False
-                all_episodes = []
+            needs_processing = False
+            all_episodes = []
+            
+            # First check each season
+            for season in series.get('seasons', []):
+                season_number = season.get('seasonNumber')
                 
-                # First check each season
-                for season in series.get('seasons', []):
-                    season_number = season.get('seasonNumber')
+                # Skip if season is already unmonitored in our tracking
+                if season_number in unmonitored_seasons.get(series['id'], ()):
+                    continue
                     
-                    # Skip if season is already unmonitored in our tracking
-                    if series['id'] in state['sonarr'].get('unmonitored_seasons', {}) and \
-                       season_number in state['sonarr']['unmonitored_seasons'].get(series['id'], []):
-                        continue
+                # If season is not monitored in Sonarr, track it but skip
+                if not season.get('monitored', True):
+                    # Add to our tracking if not already there
+                    series_seasons = unmonitored_seasons.setdefault(series['id'], [])
+                    if season_number not in series_seasons:
+                        series_seasons.append(season_number)
                         
-                    # If season is not monitored in Sonarr, track it but skip
-                    if not season.get('monitored', True):
-                        # Initialize season tracking if needed
-                        if 'unmonitored_seasons' not in state['sonarr']:
-                            state['sonarr']['unmonitored_seasons'] = {}
-                        if series['id'] not in state['sonarr']['unmonitored_seasons']:
-                            state['sonarr']['unmonitored_seasons'][series['id']] = []
-                            
-                        # Add to our tracking if not already there
-                        if season_number not in state['sonarr']['unmonitored_seasons'][series['id']]:
-                            state['sonarr']['unmonitored_seasons'][series['id']].append(season_number)
-                            
-                        continue
-                    
-                    # Get episodes for this season
-                    episodes = get_episodes(config, series['id'], season_number)
-                    if episodes:
-                        all_episodes.extend(episodes)
+                    continue
                 
-                # Now check individual episodes
-                for episode in all_episodes:
-                    # Skip episodes already marked as unmonitored
-                    if episode['id'] in state['sonarr'].get('unmonitored_episode_ids', []):
-                        continue
-                        
-                    # If already unmonitored in Sonarr, record it but skip
-                    if not episode.get('monitored', True):
-                        if episode['id'] not in state['sonarr'].get('unmonitored_episode_ids', []):
-                            state['sonarr']['unmonitored_episode_ids'].append(episode['id'])
-                        continue
-                    
-                    if not episode.get('hasFile', False) or not episode.get('episodeFileId'):
-                        continue
-                    
-                    # New episode file added
-                    if 'episodeFile' in episode and 'dateAdded' in episode['episodeFile']:
-                        file_date = date_parser.parse(episode['episodeFile']['dateAdded'])
-                        if file_date.tzinfo is not None:
-                            file_date = file_date.replace(tzinfo=None)
-                        if file_date > last_scan_date:
-                            needs_processing = True
-                            break
+                # Get episodes for this season
+                all_episodes.extend(episodes_by_season.get(season_number, []))
+            
+            # Now check individual episodes
+            for episode in all_episodes:
+                # Skip episodes already marked as unmonitored
+                if episode['id'] in unmonitored_episode_ids:
+                    continue
                     
-                    # Episode hasn't been processed yet
-                    if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
+                # If already unmonitored in Sonarr, record it but skip
+                if not episode.get('monitored', True):
+                    unmonitored_episode_ids.add(episode['id'])
+                    continue
+                
+                if not episode.get('hasFile', False) or not episode.get('episodeFileId'):
+                    continue
+                
+                # New episode file added
+                if 'episodeFile' in episode and 'dateAdded' in episode['episodeFile']:
+                    file_date = parse_date(episode['episodeFile']['dateAdded'])
+                    if file_date > last_scan_date:
                         needs_processing = True
                         break
                 
-                if needs_processing:
-                    include_series = True
+                # Episode hasn't been processed yet
+                if episode['id'] not in processed_episode_ids:
+                    needs_processing = True
+                    break
             
-            # Include new or unprocessed series
-            if include_series or series['id'] not in state['sonarr'].get('processed_ids', []):
-                series_to_process.append(series)
+            if needs_processing:
+                included.add(series['id'])
+                cache_episodes(config, series['id'], episodes_by_series[series['id']])
+            else:
+                # Nothing new; remember the file statistics this was checked against
+                stats = series_file_stats(series)
+                if stats is not None:
+                    series_stats[series['id']] = stats
+        
+        # Include new or unprocessed series, keeping Sonarr's order
+        series_to_process = [
+            series for series in all_series
+            if series['id'] not in unmonitored_series_ids
+            and (series['id'] in included or series['id'] not in processed_series_ids)
+        ]
         
         logger.info(f"Found {len(series_to_process)} series to process (new/updated/not unmonitored)")
         return series_to_process
 
 def get_file_details(config, media_id, file_id=None):
-    """Get file details for a specific movie or series/episode"""
+    """Get file details for a specific movie or series/episode, or None if the request failed"""
     api_url = get_api_url(config)
-    headers = get_headers(config)
     
     if config['service'] == 'radarr':
         url = f"{api_url}/moviefile?movieId={media_id}"
@@ -3587,24 +1026,21 @@ def get_file_details(config, media_id, file_id=None):
             # Get a specific episode file
             url = f"{api_url}/episodefile/{file_id}"
             try:
-                response = requests.get(url, headers=headers, timeout=30)
-                response.raise_for_status()
-                return [response.json()]  # Return as a list for consistent handling
+                response = api_request(config, 'GET', url)
+                return [response_json(response)]  # Return as a list for consistent handling
             except requests.exceptions.RequestException as e:
-                if config.get('debug'):
-                    logger.debug(f"Failed to get episode file {file_id}: {str(e)}")
-                return []
+                logger.debug("Failed to get episode file %s: %s", file_id, e)
+                return None
         else:
             # Get all episode files for a series
             url = f"{api_url}/episodefile?seriesId={media_id}"
     
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        response = api_request(config, 'GET', url)
+        return response_json(response)
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to get file details: {str(e)}")
-        return []
+        return None
 
 def get_seasons_for_series(config, series_id):
     """
@@ -3619,14 +1055,12 @@ def get_seasons_for_series(config, series_id):
         list: List of seasons with metadata
     """
     api_url = get_api_url(config)
-    headers = get_headers(config)
     
     try:
         # Get the series first to access the seasons array
         url = f"{api_url}/series/{series_id}"
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        series = response.json()
+        response = api_request(config, 'GET', url)
+        series = response_json(response)
         
         if 'seasons' not in series:
             logger.warning(f"No seasons array found for series ID {series_id}")
@@ -3638,44 +1072,48 @@ def get_seasons_for_series(config, series_id):
         logger.error(f"Failed to get seasons for series {series_id}: {str(e)}")
         return []
 
+def cache_episodes(config, series_id, episodes):
+    """Keep a series' episodes (as returned by get_episodes) for its next get_episodes call"""
+    now = time.monotonic()
+    # Drop entries that were never picked up, e.g. series cut by sample_size
+    for key in [key for key, (expires, _) in _episode_cache.items() if expires <= now]:
+        _episode_cache.pop(key, None)
+    _episode_cache[(config['service'], series_id)] = (now + EPISODE_CACHE_TTL, episodes)
+
 def get_episodes(config, series_id, season_number=None):
-    """Fetch episodes for a series, optionally filtered by season (Sonarr only)"""
+    """
+    Fetch episodes with files for a series, optionally filtered by season (Sonarr only).
+    Returns None if the request failed, so callers can tell it from a series without files.
+    """
     if config['service'] != 'sonarr':
         return []
+    
+    # Reuse the episodes fetch_new_media already downloaded in this scan
+    if season_number is None:
+        cached = _episode_cache.pop((config['service'], series_id), None)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
         
     api_url = get_api_url(config)
-    headers = get_headers(config)
     url = f"{api_url}/episode?seriesId={series_id}"
     
-    # Add retry logic for more resilience
-    max_retries = 3
-    retry_delay = 2  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            episodes = response.json()
-            
-            # Filter by season if specified
-            if season_number is not None:
-                episodes = [ep for ep in episodes if ep.get('seasonNumber') == season_number]
-                
-            # Keep only episodes with files
-            episodes_with_files = [ep for ep in episodes if ep.get('hasFile', False)]
+    try:
+        response = api_request(config, 'GET', url)
+        episodes = response_json(response)
+        
+        # Filter by season if specified
+        if season_number is not None:
+            episodes = [ep for ep in episodes if ep.get('seasonNumber') == season_number]
             
-            if config.get('debug'):
-                logger.debug(f"Found {len(episodes_with_files)}/{len(episodes)} episodes with files for season {season_number}")
-                
-            return episodes_with_files
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                logger.warning(f"API request failed, retrying in {retry_delay}s: {str(e)}")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                logger.error(f"Failed to get episodes after {max_retries} attempts: {str(e)}")
-                return []
+        # Keep only episodes with files
+        episodes_with_files = [ep for ep in episodes if ep.get('hasFile', False)]
+        
+        logger.debug("Found %s/%s episodes with files for season %s", len(episodes_with_files), len(episodes), season_number)
+        
+        return episodes_with_files
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to get episodes for series {series_id}: {str(e)}")
+        return None
 
 def get_release_group(file_path, config):
     """
@@ -3693,182 +1131,223 @@ def get_release_group(file_path, config):
     # First, remove the file extension
     basename = os.path.splitext(filename)[0]
     
-    if config.get('debug'):
-        logger.debug(f"Analyzing filename for release group: {basename}")
+    # Checked once; the debug-only work below is skipped entirely otherwise
+    debug = logger.isEnabledFor(logging.DEBUG)
+    
+    if debug:
+        logger.debug("Analyzing filename for release group: %s", basename)
     
     # For troubleshooting, extract and log the last portion of the filename
     # This helps identify patterns we might be missing
-    last_segment = basename.split('-')[-1] if '-' in basename else ''
-    if last_segment and config.get('debug'):
-        logger.debug(f"Last segment after hyphen: {last_segment}")
+    if debug:
+        last_segment = basename.rpartition('-')[2] if '-' in basename else ''
+        if last_segment:
+            logger.debug("Last segment after hyphen: %s", last_segment)
+    
+    group, rule = match_release_group(basename)
+    
+    if debug:
+        if group:
+            logger.debug("Found release group: %s using %s", group, rule)
+        else:
+            logger.debug("No release group found in: %s", basename)
+    return group
+
+@lru_cache(maxsize=65536)
+def match_release_group(basename):
+    """
+    Match a filename without extension against the release group rules.
+    
+    Pure and memoized, so unchanged files cost nothing on later scans.
+    
+    Returns:
+        tuple: (release group or None, description of the rule that matched)
+    """
+    # Try the ordered pattern table in a single pass (see RELEASE_GROUP_PATTERNS)
+    match = _RELEASE_GROUP_RE.match(basename)
+    if match:
+        # Clean up the group name (remove trailing dots, etc)
+        group = match.group(match.lastindex).rstrip('.')
+        return group, f"pattern: {RELEASE_GROUP_PATTERNS[match.lastindex - 1]}"
     
     # Special handling for specific scene/p2p naming conventions
     # This handles cases where the release group might be embedded in a complex pattern
-    scene_pattern = r'(?:\.|\-|\[|\s)((?:AMIABLE|SPARKS|GECKOS|DRONES|EVO|YIFY|YTS|RARBG)\b.*?)(?:\.|\]|\[|\-|$)'
-    match = re.search(scene_pattern, basename, re.IGNORECASE)
+    match = _SCENE_GROUP_RE.search(basename)
     if match:
-        group = match.group(1)
-        if config.get('debug'):
-            logger.debug(f"Found release group using scene pattern: {group}")
-        return group
+        return match.group(1), "scene pattern"
         
     # Check for common abbreviations that might be release groups
-    common_groups = ['yts', 'yify', 'rarbg', 'ettv', 'eztv', 'ctrlhd', 'ntb', 'web', 'web-dl']
-    for group in common_groups:
-        # Look for the group with word boundaries
-        pattern = r'(?:^|\W)(' + re.escape(group) + r')(?:$|\W)'
-        match = re.search(pattern, basename, re.IGNORECASE)
-        if match:
-            found_group = match.group(1)
-            if config.get('debug'):
-                logger.debug(f"Found common release group: {found_group}")
-            return found_group
+    match = _COMMON_GROUP_RE.match(basename)
+    if match:
+        return match.group(match.lastindex), "common release group list"
     
     # Handle potential multi-word groups with spaces
-    space_pattern = r'-\s*([A-Za-z0-9]+(?: [A-Za-z0-9]+)+)'
-    match = re.search(space_pattern, basename)
+    match = _MULTI_WORD_GROUP_RE.search(basename)
     if match:
-        group = match.group(1)
-        if config.get('debug'):
-            logger.debug(f"Found multi-word release group: {group}")
-        return group
-            
-    if config.get('debug'):
-        logger.debug(f"No release group found in: {basename}")
-    return None
+        return match.group(1), "multi-word pattern"
+    
+    return None, None
 
-def unmonitor_media(config, media_item):
-    """Unmonitor a media item in Radarr/Sonarr"""
-    if config['dry_run']:
-        logger.info(f"[DRY RUN] Would unmonitor: {media_item['title']}")
-        return True
-        
+def set_unmonitored(config, ids):
+    """
+    Unmonitor movies (Radarr) or series (Sonarr) through the editor endpoint.
+    Only the IDs and the monitored flag are sent, not the full item.
+    Raises requests.exceptions.RequestException on failure.
+    """
     api_url = get_api_url(config)
-    headers = get_headers(config)
     
-    # Clone the media item and update monitored status
-    updated_item = media_item.copy()
-    updated_item['monitored'] = False
-    
-    endpoint = "movie" if config['service'] == 'radarr' else "series"
-    url = f"{api_url}/{endpoint}/{media_item['id']}"
+    if config['service'] == 'radarr':
+        url = f"{api_url}/movie/editor"
+        body = {'movieIds': list(ids), 'monitored': False}
+    else:
+        url = f"{api_url}/series/editor"
+        body = {'seriesIds': list(ids), 'monitored': False}
     
-    logger.info(f"Unmonitoring: {media_item['title']}")
+    return api_request(config, 'PUT', url, json=body)
+
+def unmonitor_media(config, media_items):
+    """Unmonitor a batch of media items in Radarr/Sonarr with a single request"""
+    if config['dry_run']:
+        for media_item in media_items:
+            logger.info(f"[DRY RUN] Would unmonitor: {media_item['title']}")
+        return True
+        
+    for media_item in media_items:
+        logger.info(f"Unmonitoring: {media_item['title']}")
     try:
-        response = requests.put(url, headers=headers, json=updated_item, timeout=30)
-        response.raise_for_status()
+        set_unmonitored(config, [media_item['id'] for media_item in media_items])
         return True
     except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to unmonitor {media_item['title']}: {str(e)}")
+        logger.error(f"Failed to unmonitor {len(media_items)} items: {str(e)}")
+        return False
+
+def record_result(item_id, status, processed_ids, unmonitored_ids):
+    """
+    Record a process_movie/process_episode status in the state sets.
+    Called by the thread consuming the results (merge_movie_results,
+    merge_series_result), never from the worker threads.
+    Returns True if the item was unmonitored by this run.
+    """
+    if status is None:
         return False
+    processed_ids.add(item_id)
+    if status != 'processed':
+        unmonitored_ids.add(item_id)
+    return status == 'unmonitored'
 
 def process_movie(item, config, target_groups, state):
-    """Process a single movie, tracking unmonitored status"""
+    """
+    Process a single movie and report its outcome.
+
+    The state is only read here so this can run on worker threads; the caller
+    records the returned status with record_result():
+    'match' - from a target group; the caller unmonitors matches in batches
+              and records them as 'unmonitored' (or 'processed' on failure)
+    'tracked' - already unmonitored in Radarr
+    'processed' - checked, nothing to do
+    None - skipped or failed, not recorded
+    """
     try:
         movie_title = item.get('title', 'Unknown')
         
         # Skip if already unmonitored in our tracking
         if item['id'] in state['radarr'].get('unmonitored_ids', []):
-            if config.get('debug'):
-                logger.debug(f"Skipping already unmonitored movie: {movie_title}")
-            return False
+            logger.debug("Skipping already unmonitored movie: %s", movie_title)
+            return None
             
         # Skip if not monitored in Radarr, but track it
         if not item.get('monitored', True):
-            if config.get('debug'):
-                logger.debug(f"Movie already unmonitored in Radarr: {movie_title}")
-                
-            # Add to our unmonitored tracking
-            if item['id'] not in state['radarr'].get('unmonitored_ids', []):
-                state['radarr']['unmonitored_ids'].append(item['id'])
-                
-            # Add to processed items for this run
-            if item['id'] not in state['radarr'].get('processed_ids', []):
-                state['radarr']['processed_ids'].append(item['id'])
-                
-            return False
+            logger.debug("Movie already unmonitored in Radarr: %s", movie_title)
+            
+            # Track it as unmonitored and processed
+            return 'tracked'
             
         # Get file details for the movie
         files = get_file_details(config, item['id'])
         
-        if config.get('debug') and not files:
-            logger.debug(f"No files found for: {movie_title}")
+        # Not recorded, so the movie is checked again next scan
+        if files is None:
+            return None
+        
+        if not files:
+            logger.debug("No files found for: %s", movie_title)
             
             # Still mark as processed
-            if item['id'] not in state['radarr'].get('processed_ids', []):
-                state['radarr']['processed_ids'].append(item['id'])
-                
-            return False
+            return 'processed'
         
         for file in files:
             if 'path' in file:
-                if config.get('debug'):
-                    logger.debug(f"Checking file: {file['path']}")
-                    
+                logger.debug("Checking file: %s", file['path'])
+                
+                # A matching release group is always a substring of the filename,
+                # so files that contain none of the targets can skip the regex work
+                path_lower = file['path'].lower()
+                if not any(group in path_lower for group in target_groups):
+                    continue
+                
                 release_group = get_release_group(file['path'], config)
                 
                 if release_group:
                     # Normalize to lowercase for case-insensitive comparison
                     release_group_lower = release_group.lower()
                     
-                    if config.get('debug'):
-                        logger.debug(f"Comparing '{release_group_lower}' with targets: {target_groups}")
+                    logger.debug("Comparing '%s' with targets: %s", release_group_lower, target_groups)
                     
                     if release_group_lower in target_groups:
                         logger.info(f"Match! Release group '{release_group}' found in {movie_title}")
                         
-                        # Add to processed items list
-                        if item['id'] not in state['radarr'].get('processed_ids', []):
-                            state['radarr']['processed_ids'].append(item['id'])
-                        
-                        # Unmonitor the movie
-                        if unmonitor_media(config, item):
-                            # Add to unmonitored list only if successfully unmonitored
-                            if item['id'] not in state['radarr'].get('unmonitored_ids', []):
-                                state['radarr']['unmonitored_ids'].append(item['id'])
-                            return True
+                        # Unmonitored in batches by merge_movie_results
+                        return 'match'
         
-        # Add to processed items since we've checked it but didn't unmonitor
-        if item['id'] not in state['radarr'].get('processed_ids', []):
-            state['radarr']['processed_ids'].append(item['id'])
-            
-        return False
+        # Processed since we've checked it but didn't unmonitor
+        return 'processed'
     except Exception as e:
         logger.error(f"Error processing {item.get('title', 'unknown')}: {str(e)}")
-        return False
+        return None
 
-def unmonitor_episode(config, episode):
-    """Unmonitor a specific episode (Sonarr only)"""
-    if config['service'] != 'sonarr':
+def unmonitor_episodes(config, episodes):
+    """
+    Unmonitor a batch of episodes with a single request (Sonarr only).
+    Uses the episode/monitor endpoint instead of one PUT per episode.
+    """
+    if config['service'] != 'sonarr' or not episodes:
         return False
         
     if config['dry_run']:
-        if config.get('debug'):
-            logger.debug(f"[DRY RUN] Would unmonitor episode ID {episode['id']}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for episode in episodes:
+                logger.debug(f"[DRY RUN] Would unmonitor episode ID {episode['id']}")
         return True
         
     api_url = get_api_url(config)
-    headers = get_headers(config)
+    url = f"{api_url}/episode/monitor"
     
-    # Clone the episode and update monitored status
-    updated_episode = episode.copy()
-    updated_episode['monitored'] = False
-    
-    url = f"{api_url}/episode/{episode['id']}"
-    
-    episode_id = f"S{episode.get('seasonNumber', '?')}E{episode.get('episodeNumber', '?')}"
-    logger.info(f"Unmonitoring: {episode_id} - {episode.get('title', 'Unknown')}")
+    for episode in episodes:
+        episode_id = f"S{episode.get('seasonNumber', '?')}E{episode.get('episodeNumber', '?')}"
+        logger.info(f"Unmonitoring: {episode_id} - {episode.get('title', 'Unknown')}")
     
     try:
-        response = requests.put(url, headers=headers, json=updated_episode, timeout=30)
-        response.raise_for_status()
+        api_request(config, 'PUT', url, json={
+            'episodeIds': [episode['id'] for episode in episodes],
+            'monitored': False
+        })
         return True
     except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to unmonitor episode {episode['id']}: {str(e)}")
+        logger.error(f"Failed to unmonitor {len(episodes)} episodes: {str(e)}")
         return False
 
-def process_episode(episode, config, target_groups, state):
-    """Process a single episode, tracking unmonitored status"""
+def process_episode(episode, config, target_groups, state, episode_files=None):
+    """
+    Process a single episode and report its outcome.
+
+    Like process_movie, this only reads the state and returns a status for
+    the caller to record with record_result(). A matching episode is not
+    unmonitored here; it is reported as 'match' so the caller can unmonitor
+    all matches of a series with one request.
+
+    episode_files maps episode file IDs to the series' files when they were
+    fetched in bulk; files missing from it are fetched individually.
+    """
     try:
         # Get season and episode numbers for display
         season_num = episode.get('seasonNumber', '?')
@@ -3879,91 +1358,71 @@ def process_episode(episode, config, target_groups, state):
         
         # Skip if already unmonitored in our tracking
         if episode['id'] in state['sonarr'].get('unmonitored_episode_ids', []):
-            if config.get('debug'):
-                logger.debug(f"Skipping already unmonitored episode: {episode_title}")
-            return False
+            logger.debug("Skipping already unmonitored episode: %s", episode_title)
+            return None
             
         # Skip if not monitored in Sonarr, but track it
         if not episode.get('monitored', True):
-            if config.get('debug'):
-                logger.debug(f"Episode already unmonitored in Sonarr: {episode_title}")
-                
-            # Add to our unmonitored tracking
-            if episode['id'] not in state['sonarr'].get('unmonitored_episode_ids', []):
-                state['sonarr']['unmonitored_episode_ids'].append(episode['id'])
-                
-            # Add to processed list for this run
-            if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                state['sonarr']['processed_episode_ids'].append(episode['id'])
-                
-            return False
+            logger.debug("Episode already unmonitored in Sonarr: %s", episode_title)
+            
+            # Track it as unmonitored and processed
+            return 'tracked'
         
         if not episode.get('hasFile', False) or not episode.get('episodeFileId'):
-            if config.get('debug'):
-                logger.debug(f"Episode has no file: {episode_title}")
-                
-            # Add to processed list since we've checked it
-            if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                state['sonarr']['processed_episode_ids'].append(episode['id'])
-                
-            return False
+            logger.debug("Episode has no file: %s", episode_title)
+            
+            # Processed since we've checked it
+            return 'processed'
             
         # Get file details for the episode
-        file_details_list = get_file_details(config, None, episode['episodeFileId'])
+        file_details = episode_files.get(episode['episodeFileId']) if episode_files else None
+        file_details_list = [file_details] if file_details else \
+            get_file_details(config, None, episode['episodeFileId'])
+        
+        # Not recorded, so the episode is checked again next scan
+        if file_details_list is None:
+            return None
         
         if not file_details_list:
-            # Add to processed list since we've checked it
-            if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                state['sonarr']['processed_episode_ids'].append(episode['id'])
-                
-            return False
+            # Processed since we've checked it
+            return 'processed'
             
         file_details = file_details_list[0]  # We should only have one file
         
         if 'path' not in file_details:
-            # Add to processed list since we've checked it
-            if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                state['sonarr']['processed_episode_ids'].append(episode['id'])
-                
-            return False
+            # Processed since we've checked it
+            return 'processed'
+        
+        logger.debug("Checking file: %s", file_details['path'])
+        
+        # A matching release group is always a substring of the filename,
+        # so files that contain none of the targets can skip the regex work
+        path_lower = file_details['path'].lower()
+        if not any(group in path_lower for group in target_groups):
+            return 'processed'
         
-        if config.get('debug'):
-            logger.debug(f"Checking file: {file_details['path']}")
-                
         release_group = get_release_group(file_details['path'], config)
             
         if release_group:
             # Normalize to lowercase for case-insensitive comparison
             release_group_lower = release_group.lower()
             
-            if config.get('debug'):
-                logger.debug(f"Comparing '{release_group_lower}' with targets: {target_groups}")
+            logger.debug("Comparing '%s' with targets: %s", release_group_lower, target_groups)
             
             if release_group_lower in target_groups:
                 logger.info(f"Match! Release group '{release_group}' found in {episode_title}")
                 
-                # Add to processed items list
-                if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-                    state['sonarr']['processed_episode_ids'].append(episode['id'])
-                
-                # Unmonitor the episode - ONLY the individual episode, not the season or series
+                # Unmonitored in bulk by the caller - ONLY the individual episode, not the season or series
                 # (Hierarchical unmonitoring will be handled by process_series_hierarchical)
-                if unmonitor_episode(config, episode):
-                    # Add to unmonitored list only if successfully unmonitored
-                    if episode['id'] not in state['sonarr'].get('unmonitored_episode_ids', []):
-                        state['sonarr']['unmonitored_episode_ids'].append(episode['id'])
-                    return True
+                return 'match'
         
-        # Add to processed items since we've checked it but didn't unmonitor
-        if episode['id'] not in state['sonarr'].get('processed_episode_ids', []):
-            state['sonarr']['processed_episode_ids'].append(episode['id'])
-            
-        return False
+        # Processed since we've checked it but didn't unmonitor
+        return 'processed'
     except Exception as e:
         logger.error(f"Error processing episode {episode.get('id', 'unknown')}: {str(e)}")
-        return False
+        return None
 
-def check_and_unmonitor_season(config, series_id, season_number, state):
+def check_and_unmonitor_season(config, series_id, season_number, state, episodes=None):
     """
     Check if all episodes in a season have been unmonitored, and if so,
     unmonitor the entire season.
@@ -3973,12 +1432,13 @@ def check_and_unmonitor_season(config, series_id, season_number, state):
         series_id: ID of the series 
         season_number: Season number to check
         state: Current state dictionary
+        episodes: Episodes of the season if already fetched
         
     Returns:
         bool: True if season was unmonitored, False otherwise
     """
     # Get all episodes for this season
-    all_episodes = get_episodes(config, series_id, season_number)
+    all_episodes = episodes if episodes is not None else get_episodes(config, series_id, season_number)
     if not all_episodes:
         return False
         
@@ -4019,14 +1479,12 @@ def unmonitor_season(config, series_id, season_number, state):
         
     # Get the current series details to access the seasons array
     api_url = get_api_url(config)
-    headers = get_headers(config)
     
     try:
         # Get the series
         url = f"{api_url}/series/{series_id}"
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        series = response.json()
+        response = api_request(config, 'GET', url)
+        series = response_json(response)
         
         # Store the series title for logging
         series_title = series.get('title', f"Series ID {series_id}")
@@ -4045,8 +1503,7 @@ def unmonitor_season(config, series_id, season_number, state):
             return False
             
         # Update the series with the modified season
-        response = requests.put(url, headers=headers, json=series, timeout=30)
-        response.raise_for_status()
+        response = api_request(config, 'PUT', url, json=series)
         
         logger.info(f"Successfully unmonitored season {season_number} of {series_title}")
         
@@ -4069,7 +1526,7 @@ def unmonitor_season(config, series_id, season_number, state):
         logger.error(f"Error in unmonitor_season: {str(e)}")
         return False
 
-def check_and_unmonitor_full_series(config, series_id, state):
+def check_and_unmonitor_full_series(config, series_id, state, seasons=None, episodes_by_season=None):
     """
     Check if all seasons with files have been unmonitored, and if so,
     unmonitor the entire series while preserving the ability to monitor new seasons.
@@ -4078,12 +1535,15 @@ def check_and_unmonitor_full_series(config, series_id, state):
         config: Configuration dictionary with API details
         series_id: ID of the series to check
         state: Current state dictionary
+        seasons: Seasons of the series if already fetched
+        episodes_by_season: Episodes keyed by season number if already fetched
         
     Returns:
         bool: True if series was unmonitored, False otherwise
     """
     # Get all seasons for this series
-    seasons = get_seasons_for_series(config, series_id)
+    if seasons is None:
+        seasons = get_seasons_for_series(config, series_id)
     if not seasons:
         return False
     
@@ -4105,7 +1565,10 @@ def check_and_unmonitor_full_series(config, series_id, state):
             continue
             
         # Get episodes for this season
-        episodes = get_episodes(config, series_id, season_number)
+        if episodes_by_season is not None:
+            episodes = episodes_by_season.get(season_number, [])
+        else:
+            episodes = get_episodes(config, series_id, season_number) or []
         episodes_with_files = [ep for ep in episodes if ep.get('hasFile', False)]
         
         if episodes_with_files:
@@ -4143,37 +1606,15 @@ def unmonitor_series_keep_seasons(config, series_id, state):
         logger.info(f"[DRY RUN] Would unmonitor series ID {series_id}")
         return True
         
-    # Get the current series details
-    api_url = get_api_url(config)
-    headers = get_headers(config)
-    
     try:
-        # Get the series
-        url = f"{api_url}/series/{series_id}"
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        series = response.json()
-        
-        # Store the series title for logging
-        series_title = series.get('title', f"Series ID {series_id}")
-        
-        # Modify only the monitored status while preserving other settings
-        series['monitored'] = False
-        
-        # Make sure seasonFolder is true to pick up new seasons
-        if 'seasonFolder' in series:
-            # Keep the existing value - don't change it
-            logger.debug(f"Preserving seasonFolder setting: {series['seasonFolder']}")
-        
-        # Update the series
-        response = requests.put(url, headers=headers, json=series, timeout=30)
-        response.raise_for_status()
+        # Modify only the monitored status; the editor endpoint leaves the
+        # seasons and other settings such as seasonFolder untouched
+        set_unmonitored(config, [series_id])
         
-        logger.info(f"Successfully unmonitored series: {series_title} (new seasons will still be monitored)")
+        logger.info(f"Successfully unmonitored series ID {series_id} (new seasons will still be monitored)")
         
         # Add to unmonitored series list in state
-        if series_id not in state['sonarr'].get('unmonitored_ids', []):
-            state['sonarr']['unmonitored_ids'].append(series_id)
+        state['sonarr']['unmonitored_ids'].add(series_id)
             
         return True
         
@@ -4187,13 +1628,11 @@ def unmonitor_series_keep_seasons(config, series_id, state):
 def get_series_name(config, series_id):
     """Helper function to get a series name for logging purposes"""
     api_url = get_api_url(config)
-    headers = get_headers(config)
     
     try:
         url = f"{api_url}/series/{series_id}"
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        series = response.json()
+        response = api_request(config, 'GET', url)
+        series = response_json(response)
         return series.get('title', f"Series ID {series_id}")
     except:
         return f"Series ID {series_id}"
@@ -4204,112 +1643,164 @@ def process_series_hierarchical(config, series, target_groups, state):
     1. Unmonitor individual episodes that match target groups
     2. Unmonitor seasons where all episodes are unmonitored
     3. Unmonitor the series if all seasons are unmonitored
+    
+    Series are processed concurrently on process_media_sonarr's worker threads,
+    so the state is only read here. Season and series updates go to a private
+    copy of this series' part of the state, and everything is returned for
+    merge_series_result() to record on the consuming thread.
+    
+    Returns:
+        dict: episode_results ((episode ID, status) pairs, see process_episode),
+              unmonitored_seasons, unmonitored_ids, series_stats (None if the
+              series has to be checked again), seasons_unmonitored and
+              series_unmonitored counts
     """
     series_id = series['id']
     series_title = series['title']
-    
-    # Initialize tracking for unmonitored seasons if needed
-    if 'unmonitored_seasons' not in state['sonarr']:
-        state['sonarr']['unmonitored_seasons'] = {}
-        
-    if series_id not in state['sonarr'].get('unmonitored_seasons', {}):
-        state['sonarr']['unmonitored_seasons'][series_id] = []
+    sonarr_state = state['sonarr']
+    
+    # Private view of this series' tracking; the season and series helpers
+    # below record into it instead of the shared state
+    series_state = {'sonarr': {
+        'unmonitored_ids': set(),
+        'unmonitored_episode_ids': set(),
+        'unmonitored_seasons': {series_id: list(sonarr_state.get('unmonitored_seasons', {}).get(series_id, []))}
+    }}
+    tracked_seasons = series_state['sonarr']['unmonitored_seasons'][series_id]
+    result = {
+        'episode_results': [],
+        'unmonitored_seasons': tracked_seasons,
+        'unmonitored_ids': series_state['sonarr']['unmonitored_ids'],
+        'series_stats': None,
+        'seasons_unmonitored': 0,
+        'series_unmonitored': 0
+    }
     
     # Get all seasons for the series
     seasons = get_seasons_for_series(config, series_id)
     if not seasons:
-        logger.debug(f"No seasons found for: {series_title}")
-            
-        # Mark as processed even if no seasons found
-        if series_id not in state['sonarr'].get('processed_ids', []):
-            state['sonarr']['processed_ids'].append(series_id)
-            
-        return 0, 0, 0
-    
-    # Track progress
-    unmonitored_episodes = 0
-    unmonitored_seasons = 0
-    series_unmonitored = 0
-    
-    # Process each season
+        logger.debug("No seasons found for: %s", series_title)
+        
+        # Still marked as processed when merged
+        return result
+    
+    # Fetch every episode of the series once and split it by season, rather
+    # than re-downloading the whole series for each season and each check
+    episodes = get_episodes(config, series_id)
+    fetch_failed = episodes is None
+    episodes_by_season = {}
+    for episode in episodes or ():
+        episodes_by_season.setdefault(episode.get('seasonNumber'), []).append(episode)
+    
+    # Episodes of this series already tracked as unmonitored, for the season check
+    unmonitored_episode_ids = series_state['sonarr']['unmonitored_episode_ids']
+    unmonitored_episode_ids.update(episode['id'] for episode in episodes or ()
+                                   if episode['id'] in sonarr_state['unmonitored_episode_ids'])
+    
+    # Collect the episodes of every season that still needs checking
+    pending = []
     for season in seasons:
         season_number = season.get('seasonNumber')
         
         # Skip season if it's already unmonitored in our tracking
-        if series_id in state['sonarr'].get('unmonitored_seasons', {}) and \
-           season_number in state['sonarr']['unmonitored_seasons'].get(series_id, []):
-            logger.debug(f"Skipping already unmonitored season {season_number} of {series_title}")
+        if season_number in tracked_seasons:
+            logger.debug("Skipping already unmonitored season %s of %s", season_number, series_title)
             continue
             
-        # Skip if season is not monitored in Sonarr
+        # Skip if season is not monitored in Sonarr, but add it to our tracking
         if not season.get('monitored', True):
-            logger.debug(f"Season {season_number} is already unmonitored in Sonarr")
-            
-            # Add to our tracking if not already there
-            if 'unmonitored_seasons' not in state['sonarr']:
-                state['sonarr']['unmonitored_seasons'] = {}
-            if series_id not in state['sonarr']['unmonitored_seasons']:
-                state['sonarr']['unmonitored_seasons'][series_id] = []
-                
-            # Add to our tracking if not already there
-            if season_number not in state['sonarr']['unmonitored_seasons'][series_id]:
-                state['sonarr']['unmonitored_seasons'][series_id].append(season_number)
-                
+            logger.debug("Season %s is already unmonitored in Sonarr", season_number)
+            tracked_seasons.append(season_number)
             continue
         
         # Get episodes for this season
-        episodes = get_episodes(config, series_id, season_number)
-        if not episodes:
-            logger.debug(f"No episodes found for season {season_number} of {series_title}")
+        season_episodes = episodes_by_season.get(season_number)
+        if not season_episodes:
+            logger.debug("No episodes found for season %s of %s", season_number, series_title)
             continue
             
-        logger.info(f"Processing {len(episodes)} episodes in season {season_number} of {series_title}")
-        
-        # Process episodes in this season
-        season_unmonitored_count = 0
-        
-        # Set up parallel processing
-        max_workers = config.get('concurrent', 1)
-        
-        if max_workers > 1:
-            # Create a partial function with the fixed arguments
-            process_fn = partial(process_episode, config=config, target_groups=target_groups, state=state)
-            
-            # Use ThreadPoolExecutor for concurrent processing
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Map the function to the episodes and collect results
-                results = list(executor.map(process_fn, episodes))
-                season_unmonitored_count = results.count(True)
+        logger.info(f"Processing {len(season_episodes)} episodes in season {season_number} of {series_title}")
+        pending.extend(season_episodes)
+    
+    # Fetch all episode files of the series with one request rather than one per episode
+    episode_files = {}
+    if pending:
+        files = get_file_details(config, series_id)
+        if files is None:
+            # process_episode falls back to fetching each file on its own
+            fetch_failed = True
         else:
-            # Use traditional sequential processing
-            for episode in episodes:
-                if process_episode(episode, config, target_groups, state):
-                    season_unmonitored_count += 1
-        
-        unmonitored_episodes += season_unmonitored_count
-        
-        # If we unmonitored any episodes, check if the entire season should be unmonitored
-        if season_unmonitored_count > 0:
-            if check_and_unmonitor_season(config, series_id, season_number, state):
-                unmonitored_seasons += 1
+            episode_files = {file['id']: file for file in files if 'id' in file}
+    
+    # Check the episodes of all seasons in one pass
+    statuses = [process_episode(episode, config, target_groups, state, episode_files) for episode in pending]
+    
+    # Unmonitor all matching episodes of the series with a single request
+    matches = [episode for episode, status in zip(pending, statuses) if status == 'match']
+    if matches:
+        match_status = 'unmonitored' if unmonitor_episodes(config, matches) else 'processed'
+        statuses = [match_status if status == 'match' else status for status in statuses]
+    result['episode_results'] = [(episode['id'], status) for episode, status in zip(pending, statuses)]
+    
+    # Seasons in which this run unmonitored episodes, and what the season check
+    # should count as unmonitored (see record_result)
+    unmonitored_episodes = 0
+    changed_seasons = {}
+    for episode, status in zip(pending, statuses):
+        if status in ('unmonitored', 'tracked'):
+            unmonitored_episode_ids.add(episode['id'])
+        if status == 'unmonitored':
+            changed_seasons[episode.get('seasonNumber')] = True
+            unmonitored_episodes += 1
+    
+    # If we unmonitored any episodes in a season, check if the entire season should be unmonitored
+    for season_number in changed_seasons:
+        if check_and_unmonitor_season(config, series_id, season_number, series_state,
+                                      episodes_by_season.get(season_number)):
+            result['seasons_unmonitored'] += 1
     
     # After all seasons processed, check if the entire series should be unmonitored
-    if unmonitored_seasons > 0:
-        if check_and_unmonitor_full_series(config, series_id, state):
-            series_unmonitored = 1
+    if result['seasons_unmonitored'] > 0:
+        if check_and_unmonitor_full_series(config, series_id, series_state, seasons, episodes_by_season):
+            result['series_unmonitored'] = 1
     
-    # Mark series as fully processed
-    if series_id not in state['sonarr'].get('processed_ids', []):
-        state['sonarr']['processed_ids'].append(series_id)
+    # Remember the file statistics it was processed at, unless a request failed
+    # or some episode was left unrecorded and has to be looked at again next scan
+    if not fetch_failed and None not in statuses:
+        result['series_stats'] = series_file_stats(series)
     
     # Log the results for this series
-    if unmonitored_episodes > 0 or unmonitored_seasons > 0 or series_unmonitored > 0:
+    if unmonitored_episodes > 0 or result['seasons_unmonitored'] > 0 or result['series_unmonitored'] > 0:
         action = "Would have unmonitored" if config['dry_run'] else "Unmonitored"
-        logger.info(f"{action} {unmonitored_episodes} episodes across {unmonitored_seasons} seasons in {series_title}")
-        if series_unmonitored:
+        logger.info(f"{action} {unmonitored_episodes} episodes across {result['seasons_unmonitored']} seasons in {series_title}")
+        if result['series_unmonitored']:
             logger.info(f"{action} the entire series {series_title} while preserving new season monitoring")
     
-    return unmonitored_episodes, unmonitored_seasons, series_unmonitored
+    return result
+
+def merge_series_result(state, series_id, result):
+    """
+    Record a process_series_hierarchical result in the state. Called only by
+    process_media_sonarr's consuming thread, so it is the single writer.
+    
+    Returns:
+        tuple: (episodes, seasons, series) unmonitored by this run
+    """
+    sonarr_state = state['sonarr']
+    processed_ids = sonarr_state['processed_episode_ids']
+    unmonitored_ids = sonarr_state['unmonitored_episode_ids']
+    unmonitored_episodes = sum(record_result(episode_id, status, processed_ids, unmonitored_ids)
+                               for episode_id, status in result['episode_results'])
+    
+    sonarr_state.setdefault('unmonitored_seasons', {})[series_id] = result['unmonitored_seasons']
+    sonarr_state['unmonitored_ids'].update(result['unmonitored_ids'])
+    if result['series_stats'] is not None:
+        sonarr_state.setdefault('series_stats', {})[series_id] = result['series_stats']
+    
+    # Mark series as fully processed
+    sonarr_state['processed_ids'].add(series_id)
+    
+    return unmonitored_episodes, result['seasons_unmonitored'], result['series_unmonitored']
 
 def process_media_sonarr(config, state=None, monitoring_mode=False):
     """
@@ -4321,15 +1812,7 @@ def process_media_sonarr(config, state=None, monitoring_mode=False):
     """
     # Initialize state if not provided
     if state is None:
-        state = {
-            'sonarr': {
-                'processed_ids': [],
-                'processed_episode_ids': [],
-                'unmonitored_ids': [],
-                'unmonitored_episode_ids': [],
-                'unmonitored_seasons': {}
-            }
-        }
+        state = create_empty_state()
     
     # Ensure unmonitored_seasons exists in state
     if 'unmonitored_seasons' not in state['sonarr']:
@@ -4348,11 +1831,12 @@ def process_media_sonarr(config, state=None, monitoring_mode=False):
     
     logger.info(f"Found {len(series_list)} series to check")
     
-    target_groups = [group.lower() for group in config['release_groups']]
+    # Lowercased target groups, precomputed once in load_config
+    target_groups = config['target_groups']
     
     # Optional: Display the first few items to verify parsing works correctly
-    if config.get('debug') and len(series_list) > 0:
-        logger.debug(f"First series: {series_list[0]['title']}")
+    if series_list:
+        logger.debug("First series: %s", series_list[0]['title'])
     
     # Track overall results with enhanced metrics
     total_episodes_unmonitored = 0
@@ -4360,27 +1844,38 @@ def process_media_sonarr(config, state=None, monitoring_mode=False):
     total_series_unmonitored = 0
     series_affected = 0
     
-    # Process each series with hierarchical unmonitoring
-    for index, series in enumerate(series_list):
-        logger.info(f"Processing {index+1}/{len(series_list)}: {series['title']}")
-        
-        # Process with hierarchical unmonitoring
-        episodes, seasons, series_unmonitored = process_series_hierarchical(
-            config, 
-            series, 
-            target_groups, 
-            state
-        )
-        
-        # Update tracking totals
-        if episodes > 0 or seasons > 0 or series_unmonitored > 0:
-            series_affected += 1
-            total_episodes_unmonitored += episodes
-            total_seasons_unmonitored += seasons
-            total_series_unmonitored += series_unmonitored
+    # Process the series concurrently; each series is handled start to finish
+    # by one worker. Request pacing is left to api_request's rate limiter.
+    max_workers = max(1, config.get('concurrent', 1))
+    if max_workers > 1:
+        logger.info(f"Using {max_workers} concurrent workers to process series")
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, initializer=set_log_service,
+                                               initargs=(get_log_service(),)) as executor:
+        futures = {
+            executor.submit(process_series_hierarchical, config, series, target_groups, state): series
+            for series in series_list
+        }
         
-        # Add a small delay between series to avoid overwhelming the API
-        time.sleep(0.1)
+        for index, future in enumerate(concurrent.futures.as_completed(futures)):
+            series = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Error processing series {series['title']}: {str(e)}")
+                continue
+            
+            # Recorded here, on this thread only, rather than by the workers
+            episodes, seasons, series_unmonitored = merge_series_result(state, series['id'], result)
+            
+            logger.info(f"Processed {index+1}/{len(series_list)}: {series['title']}")
+            
+            # Update tracking totals
+            if episodes > 0 or seasons > 0 or series_unmonitored > 0:
+                series_affected += 1
+                total_episodes_unmonitored += episodes
+                total_seasons_unmonitored += seasons
+                total_series_unmonitored += series_unmonitored
     
     # Enhanced summary report with hierarchical detail
     action = "Would have unmonitored" if config['dry_run'] else "Unmonitored"
@@ -4395,8 +1890,45 @@ def process_media_sonarr(config, state=None, monitoring_mode=False):
     
     return total_episodes_unmonitored  # Return episode count for backward compatibility
 
+def merge_movie_results(config, state, results):
+    """
+    Record (movie, status) results from process_movie in the state as they
+    arrive. Matches are unmonitored through the editor endpoint whenever
+    EDITOR_BATCH_SIZE of them have accumulated, and once more at the end.
+    
+    Returns:
+        int: Number of movies unmonitored
+    """
+    processed_ids = state['radarr']['processed_ids']
+    unmonitored_ids = state['radarr']['unmonitored_ids']
+    unmonitored_count = 0
+    batch = []
+    
+    def flush():
+        status = 'unmonitored' if unmonitor_media(config, batch) else 'processed'
+        count = sum(record_result(movie['id'], status, processed_ids, unmonitored_ids) for movie in batch)
+        batch.clear()
+        return count
+    
+    for movie, status in results:
+        if status == 'match':
+            batch.append(movie)
+            if len(batch) >= EDITOR_BATCH_SIZE:
+                unmonitored_count += flush()
+        elif record_result(movie['id'], status, processed_ids, unmonitored_ids):
+            unmonitored_count += 1
+    
+    if batch:
+        unmonitored_count += flush()
+    
+    return unmonitored_count
+
 def process_media_radarr(config, state=None, monitoring_mode=False):
     """Process all movies in Radarr and unmonitor those from specified release groups"""
+    # Initialize state if not provided
+    if state is None:
+        state = create_empty_state()
+        
     if monitoring_mode and state and state.get('last_scan'):
         logger.info(f"Running in monitoring mode, only checking new/updated movies since {state['last_scan']}")
         movies = fetch_new_media(config, state, state['last_scan'])
@@ -4409,78 +1941,107 @@ def process_media_radarr(config, state=None, monitoring_mode=False):
     
     logger.info(f"Found {len(movies)} movies to check")
     
-    target_groups = [group.lower() for group in config['release_groups']]
+    # Lowercased target groups, precomputed once in load_config
+    target_groups = config['target_groups']
     
     # Optional: Display the first few items to verify parsing works correctly
-    if config.get('debug') and len(movies) > 0:
-        logger.debug(f"First movie: {movies[0]['title']}")
+    if movies:
+        logger.debug("First movie: %s", movies[0]['title'])
     
     # Set up parallel processing
     max_workers = config.get('concurrent', 1)
-    unmonitored_count = 0
     
     if max_workers > 1:
         logger.info(f"Using {max_workers} concurrent workers to process movies")
         
-        # Create a partial function with the fixed arguments
-        process_fn = partial(process_movie, config=config, target_groups=target_groups, state=state if state else {'radarr': {'processed_ids': [], 'unmonitored_ids': []}})
-        
-        # Use ThreadPoolExecutor for concurrent processing
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Map the function to the movies and collect results
-            results = list(executor.map(process_fn, movies))
-            unmonitored_count = results.count(True)
+        # Use ThreadPoolExecutor for concurrent processing, handling each
+        # result as soon as its movie is done rather than in input order
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, initializer=set_log_service,
+                                                   initargs=(get_log_service(),)) as executor:
+            futures = {
+                executor.submit(process_movie, movie, config, target_groups, state): movie
+                for movie in movies
+            }
+            results = ((futures[future], future.result())
+                       for future in concurrent.futures.as_completed(futures))
+            unmonitored_count = merge_movie_results(config, state, results)
     else:
         # Use traditional sequential processing
         logger.info("Processing movies sequentially")
-        for movie in movies:
-            if process_movie(movie, config, target_groups, state if state else {'radarr': {'processed_ids': [], 'unmonitored_ids': []}}):
-                unmonitored_count += 1
+        results = ((movie, process_movie(movie, config, target_groups, state)) for movie in movies)
+        unmonitored_count = merge_movie_results(config, state, results)
     
     action = "Would have unmonitored" if config['dry_run'] else "Unmonitored"
     logger.info(f"{action} {unmonitored_count} movies from specified release groups")
     
     return unmonitored_count
 
-def process_media(configs, monitoring_mode=False, force_full_scan=False):
-    """Process media across all configured services with hierarchical unmonitoring support"""
+def process_media(configs, monitoring_mode=False, force_full_scan=False, state=None):
+    """
+    Process media across all configured services with hierarchical unmonitoring support.
+    
+    In monitoring mode the state is loaded from file unless the caller passes
+    the one it already holds. Returns the (updated) state.
+    """
     # Load state if in monitoring mode
-    state = load_state() if monitoring_mode else None
+    if monitoring_mode and state is None:
+        state = load_state()
     
     # If force full scan is enabled, clear the processed IDs to reprocess everything
     if force_full_scan and state:
         logger.info("Forced full scan requested - will reprocess all media")
-        state['radarr']['processed_ids'] = []
-        state['sonarr']['processed_ids'] = []
-        state['sonarr']['processed_episode_ids'] = []
+        state['radarr']['processed_ids'] = set()
+        state['sonarr']['processed_ids'] = set()
+        state['sonarr']['processed_episode_ids'] = set()
     
     total_results = {}
     
-    # Process Radarr if configured
-    if 'radarr' in configs:
-        logger.info("=== Processing Radarr ===")
-        radarr_count = process_media_radarr(configs['radarr'], state, monitoring_mode)
+    def run_service(service, process):
+        # Tag everything this service logs, including its worker threads
+        set_log_service(service)
+        try:
+            return process(configs[service], state, monitoring_mode)
+        except Exception as e:
+            # Report the failure right away instead of after the other service finishes
+            logger.error(f"Processing failed: {str(e)}")
+            raise
+        finally:
+            set_log_service(None)
+    
+    # Radarr and Sonarr are independent servers and only touch their own part
+    # of the state, so both services are processed at the same time
+    futures = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        # Process Radarr if configured
+        if 'radarr' in configs:
+            logger.info("=== Processing Radarr ===")
+            futures['radarr'] = executor.submit(run_service, 'radarr', process_media_radarr)
+        
+        # Process Sonarr if configured - with hierarchical unmonitoring
+        if 'sonarr' in configs:
+            logger.info("=== Processing Sonarr with Hierarchical Unmonitoring ===")
+            futures['sonarr'] = executor.submit(run_service, 'sonarr', process_media_sonarr)
+    
+    # A failing service must not cost the other one its results
+    errors = []
+    counts = {}
+    for service, future in futures.items():
+        try:
+            counts[service] = future.result()
+        except Exception as e:
+            errors.append(e)
+    
+    if 'radarr' in counts:
         total_results['radarr'] = {
-            'unmonitored_count': radarr_count,
+            'unmonitored_count': counts['radarr'],
             'type': 'movies'
         }
     
-    # Process Sonarr if configured - with hierarchical unmonitoring
-    if 'sonarr' in configs:
-        logger.info("=== Processing Sonarr with Hierarchical Unmonitoring ===")
-        sonarr_count = process_media_sonarr(configs['sonarr'], state, monitoring_mode)
+    if 'sonarr' in counts:
+        sonarr_count = counts['sonarr']
         
         # Get count of fully unmonitored series and seasons
-        series_unmonitored = 0
-        seasons_unmonitored = 0
-        
-        if state and 'sonarr' in state:
-            series_unmonitored = len(state['sonarr'].get('unmonitored_ids', []))
-            
-            # Count all unmonitored seasons across all series
-            if 'unmonitored_seasons' in state['sonarr']:
-                for series_id, seasons in state['sonarr']['unmonitored_seasons'].items():
-                    seasons_unmonitored += len(seasons)
+        _, _, seasons_unmonitored, series_unmonitored = count_unmonitored(state)
             
         total_results['sonarr'] = {
             'unmonitored_count': sonarr_count,
@@ -4503,50 +2064,139 @@ def process_media(configs, monitoring_mode=False, force_full_scan=False):
             if results.get('series_unmonitored', 0) > 0:
                 logger.info(f"{service.capitalize()}: {action} {results['series_unmonitored']} entire series (preserving new season monitoring)")
     
-    # Save state if in monitoring mode
+    # Save state if in monitoring mode, including whatever a failed
+    # service tracked before it failed
     if monitoring_mode:
         save_state(state)
+    
+    # Only now hand a failure to the caller, so nothing finished is lost
+    if errors:
+        raise errors[0]
+    
+    return state
+
+# Events received from Radarr/Sonarr webhooks, consumed by run_monitor_loop
+_webhook_events = queue.Queue()
+
+# Webhook payloads are small JSON documents; anything larger is rejected unread
+WEBHOOK_MAX_BODY = 1024 * 1024  # bytes
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Accept Radarr/Sonarr "Connect" webhook POSTs and queue them as scan triggers"""
+    
+    def do_POST(self):
+        # Radarr/Sonarr send the webhook's username/password as basic auth
+        # (compared as bytes: compare_digest rejects str with non-ASCII characters)
+        expected_auth = self.server.expected_auth
+        received_auth = self.headers.get('Authorization', '').encode('latin-1', 'replace')
+        if expected_auth and not hmac.compare_digest(received_auth, expected_auth):
+            logger.warning("Rejected webhook from %s: missing or invalid credentials", self.client_address[0])
+            self.send_response(401)
+            self.send_header('WWW-Authenticate', 'Basic realm="unmonitarr"')
+            self.end_headers()
+            return
+        
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= WEBHOOK_MAX_BODY:
+            self.send_response(400 if length < 0 else 413)
+            self.end_headers()
+            return
+        
+        body = self.rfile.read(length) if length else b''
+        try:
+            event_type = json_loads(body).get('eventType', 'Unknown') if body else 'Unknown'
+        except (ValueError, AttributeError):
+            event_type = 'Unknown'
+        
+        # The "Test" button in Radarr/Sonarr should not trigger a scan
+        if event_type != 'Test':
+            _webhook_events.put(event_type)
+        logger.debug("Received webhook event: %s", event_type)
+        
+        self.send_response(200)
+        self.end_headers()
+    
+    def log_message(self, format, *args):
+        # Route the default stderr access log through our logger
+        logger.debug("Webhook request from %s: %s", self.client_address[0], format % args)
+
+def start_webhook_listener(port, host='', username=None, password=None):
+    """
+    Start the webhook HTTP server in a daemon thread.
+    
+    Listens on all interfaces unless a host is given. If a password is set,
+    requests must carry matching basic auth credentials.
+    """
+    server = ThreadingHTTPServer((host, port), WebhookHandler)
+    server.expected_auth = None
+    if password:
+        credentials = f"{username or ''}:{password}".encode()
+        server.expected_auth = b"Basic " + base64.b64encode(credentials)
+    thread = threading.Thread(target=server.serve_forever, name="webhook-listener", daemon=True)
+    thread.start()
+    logger.info(f"Listening for Radarr/Sonarr webhooks on {host or '*'}:{port}"
+                f"{' (basic auth required)' if password else ''}")
+    if not password:
+        logger.warning("Webhook listener has no password set; anyone who can reach it can trigger scans")
+    return server
+
+def wait_for_next_scan(timeout, debounce=0.3):
+    """
+    Wait until the next scan is due or a webhook event arrives, whichever comes first.
+    Returns the list of webhook event types received (empty on a regular interval scan).
+    
+    After the first event, waits until no further event has arrived for `debounce`
+    seconds, so a burst of events (e.g. a bulk import) triggers a single scan.
+    The scan is never pushed past the regular deadline.
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        events = [_webhook_events.get(timeout=timeout)]
+    except queue.Empty:
+        return []
+    
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            events.append(_webhook_events.get(timeout=max(0, min(debounce, remaining))))
+        except queue.Empty:
+            return events
 
-def run_monitor_loop(configs, interval=3600):
-    """Run the script in continuous monitoring mode with enhanced hierarchical reporting"""
+def run_monitor_loop(configs, interval=3600, state=None):
+    """
+    Run the script in continuous monitoring mode with enhanced hierarchical reporting.
+    Continues with the given state (e.g. from the initial scan) instead of reloading it.
+    """
     logger.info(f"Starting monitoring loop with {interval} second interval")
     logger.info(f"Hierarchical unmonitoring enabled: episodes → seasons → series")
     
+    # Quiet period that coalesces bursts of webhook events into one scan
+    monitoring = next(iter(configs.values()), {}).get('monitoring', {})
+    debounce = monitoring.get('debounce_ms', 300) / 1000
+    
+    # The state is read from file at most once and then kept in memory between
+    # scans; process_media saves it after every scan
+    
     while True:
         try:
             start_time = time.time()
             logger.info("=== Unmonitarr Hierarchical Monitoring Scan Started ===")
             
             # Load current state to get stats for reporting
-            pre_state = load_state()
+            if state is None:
+                state = load_state()
             
             # Gather pre-run metrics
-            pre_episodes = len(pre_state.get('sonarr', {}).get('unmonitored_episode_ids', [])) if pre_state else 0
-            pre_series = len(pre_state.get('sonarr', {}).get('unmonitored_ids', [])) if pre_state else 0
-            pre_movies = len(pre_state.get('radarr', {}).get('unmonitored_ids', [])) if pre_state else 0
-            
-            # Count seasons before
-            pre_seasons = 0
-            if pre_state and 'sonarr' in pre_state and 'unmonitored_seasons' in pre_state['sonarr']:
-                for series_id, seasons in pre_state['sonarr']['unmonitored_seasons'].items():
-                    pre_seasons += len(seasons)
+            pre_movies, pre_episodes, pre_seasons, pre_series = count_unmonitored(state)
             
             # Run the media processing
-            process_media(configs, monitoring_mode=True)
-            
-            # Get updated state to show progress this run
-            post_state = load_state()
+            state = process_media(configs, monitoring_mode=True, state=state)
             
             # Gather post-run metrics
-            post_episodes = len(post_state.get('sonarr', {}).get('unmonitored_episode_ids', [])) if post_state else 0
-            post_series = len(post_state.get('sonarr', {}).get('unmonitored_ids', [])) if post_state else 0
-            post_movies = len(post_state.get('radarr', {}).get('unmonitored_ids', [])) if post_state else 0
-            
-            # Count seasons after
-            post_seasons = 0
-            if post_state and 'sonarr' in post_state and 'unmonitored_seasons' in post_state['sonarr']:
-                for series_id, seasons in post_state['sonarr']['unmonitored_seasons'].items():
-                    post_seasons += len(seasons)
+            post_movies, post_episodes, post_seasons, post_series = count_unmonitored(state)
             
             # Calculate differences for all levels
             new_episodes = post_episodes - pre_episodes
@@ -4580,7 +2230,11 @@ def run_monitor_loop(configs, interval=3600):
             next_scan_time = datetime.now() + timedelta(seconds=next_scan)
             formatted_next = next_scan_time.strftime("%Y-%m-%d %H:%M:%S")
             logger.info(f"Next scan scheduled in {next_scan:.0f} seconds (at {formatted_next})")
-            time.sleep(next_scan)
+            
+            # Without a webhook listener nothing is ever queued, so this is a plain sleep
+            events = wait_for_next_scan(next_scan, debounce)
+            if events:
+                logger.info(f"Webhook triggered early scan ({len(events)} events: {', '.join(sorted(set(events)))})")
             
         except KeyboardInterrupt:
             logger.info("Monitoring stopped by user")
@@ -4596,28 +2250,19 @@ def main():
     try:
         args = parse_arguments()
         
-        # Initialize basic logging first (will be updated after config is loaded)
+        # Set up logging once, using the log settings from the config file
         global logger
-        logger = setup_logging(debug_mode=False)
-        
-        # Load configuration from file
-        logger.info(f"Loading configuration from file: {args.config}")
-        configs = load_config(args.config)
-        
-        # Update logging based on config settings
-        # Use debug mode if any service has debug enabled
-        debug_mode = any(config.get('debug', False) for config in configs.values())
-        # Use the first service's log settings (they should be the same across services)
-        first_config = next(iter(configs.values()))
-        log_size = first_config.get('log_size', 10)
-        log_backups = first_config.get('log_backups', 3)
-        
+        debug_mode, log_size, log_backups = read_log_settings(args.config)
         logger = setup_logging(
             debug_mode=debug_mode,
             max_size_mb=log_size,
             backup_count=log_backups
         )
         
+        # Load configuration from file
+        logger.info(f"Loading configuration from file: {args.config}")
+        configs = load_config(args.config)
+        
         # Check if monitoring mode is enabled
         monitoring_mode = args.monitor or os.environ.get('MONITOR_MODE', '').lower() in ('true', 'yes', '1')
         
@@ -4645,13 +2290,24 @@ def main():
             start_time = time.time()
             logger.info("=== Unmonitarr Script Started (Monitoring Mode) ===")
             
-            process_media(configs, monitoring_mode=True, force_full_scan=args.force_full_scan)
+            state = process_media(configs, monitoring_mode=True, force_full_scan=args.force_full_scan)
             
             elapsed_time = time.time() - start_time
             logger.info(f"=== Initial Scan Completed in {elapsed_time:.2f} seconds ===")
             
+            # Optionally let Radarr/Sonarr trigger scans as soon as something is imported
+            monitoring = next(iter(configs.values()), {}).get('monitoring', {})
+            webhook_port = int(monitoring.get('webhook_port') or 0)
+            if webhook_port:
+                start_webhook_listener(
+                    webhook_port,
+                    host=monitoring.get('webhook_host') or '',
+                    username=monitoring.get('webhook_username'),
+                    password=monitoring.get('webhook_password')
+                )
+            
             # Start monitoring loop
-            run_monitor_loop(configs, monitor_interval)
+            run_monitor_loop(configs, monitor_interval, state=state)
         else:
             # Run once in standard mode
             start_time = time.time()
@@ -4668,6 +2324,8 @@ def main():
         else:
             print(f"An error occurred before logger was initialized: {str(e)}")
         sys.exit(1)
+    finally:
+        close_sessions()
 
 if __name__ == "__main__":
     main()